@@ -1,10 +1,9 @@
 import streamlit as st
-import duckdb
 import pandas as pd
 import plotly.express as px
 import numpy as np
+import pyarrow as pa
 import plotly.graph_objects as go
-import time
 import gc
 
 # Try to import psutil for memory monitoring
@@ -50,23 +49,49 @@ if 'memory_optimized' not in st.session_state:
 DB_FILE = 'job_market_std_employer.duckdb'  # Users need to create this database
 TABLE = 'job_market_data_aggressive_normalized'
 
-from database_connection import get_db_connection
+from database_connection import get_db_connection, PRIORITY_INTERACTIVE
+from dimensions import load_dimensions
+from filter_index import get_filter_index
+from figure_cache import get_cached_figure, cache_figure
+from parallel_loader import submit_loads
+from query_builder import select_rows, aggregate, execute, filtered_source
+
+# Columns each view reads - queries fetch only these. The explorer rows feed the wage chart;
+# the filter columns beside the plotted ones let the semantic row cache answer drill-downs from them
+EXPLORER_COLUMNS = [
+    'YEAR', 'EMPLOYER_STATE', 'EMPLOYER_CITY', 'aggressive_normalized_soc_title',
+    'NORMALIZED_JOB_TITLE', 'PW_WAGE_LEVEL', 'PREVAILING_WAGE'
+]
+
+# Horizontal scatter offset in [-0.2, 0.2] derived from the case number, so the same
+# petitions always land in the same place and identical filters give identical figures
+JITTER_COLUMN = "(HASH(CASE_NUMBER) % 4001) / 10000.0 - 0.2 AS x_jitter"
+
+# Plotly toolbar settings for the interactive charts
+CHART_CONFIG = {
+    'displayModeBar': True,
+    'displaylogo': False,
+    'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d', 'autoScale2d'],
+    'scrollZoom': True,
+    'responsive': True,
+    'staticPlot': False
+}
+
+# Above this many points the wage chart switches to DuckDB-binned density unless raw points are requested
+DENSITY_THRESHOLD = 20000
+WAGE_BINS = 60
+# The density chart marks at most this many of the most extreme outliers on each side of every box
+MAX_OUTLIERS_PER_SIDE = 50
 
 def get_filter_options():
+    """Companies, years, states and SOC titles for the sidebar, loaded in one round trip"""
     try:
         con = get_db_connection()
         if con is None:
             return [], [], [], []
         
-        # Load only necessary data - no limits
-        companies = con.execute(f"SELECT DISTINCT STD_EMPLOYER_NAME_PARENT FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND STD_EMPLOYER_NAME_PARENT != '' ORDER BY STD_EMPLOYER_NAME_PARENT").fetchdf()['STD_EMPLOYER_NAME_PARENT'].tolist()
-        years = con.execute(f"SELECT DISTINCT YEAR FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE ORDER BY YEAR").fetchdf()['YEAR'].tolist()
-        states = con.execute(f"SELECT DISTINCT EMPLOYER_STATE FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND EMPLOYER_STATE IS NOT NULL ORDER BY EMPLOYER_STATE").fetchdf()['EMPLOYER_STATE'].tolist()
-        soc_titles = con.execute(f"SELECT DISTINCT aggressive_normalized_soc_title FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND aggressive_normalized_soc_title IS NOT NULL ORDER BY aggressive_normalized_soc_title").fetchdf()['aggressive_normalized_soc_title'].tolist()
-        # Force cleanup after loading filter options
-        gc.collect()
-        
-        return companies, years, states, soc_titles
+        dimensions = load_dimensions(con)
+        return dimensions['employer'], dimensions['year'], dimensions['state'], dimensions['soc_title']
     except Exception as e:
         st.error(f"Failed to load filter options: {e}")
         return [], [], [], []
@@ -75,316 +100,386 @@ def get_cities(state, company, year, soc_title):
     with st.spinner("Loading cities..."):
         try:
             con = get_db_connection()
-            query = f"SELECT DISTINCT EMPLOYER_CITY FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND EMPLOYER_CITY IS NOT NULL"
-            params = []
-            if state and state != 'All':
-                query += " AND EMPLOYER_STATE = ?"
-                params.append(state)
-            if company and company != 'All':
-                query += " AND STD_EMPLOYER_NAME_PARENT = ?"
-                params.append(company)
-            if year:
-                query += " AND YEAR = ?"
-                params.append(year)
-            if soc_title and soc_title != 'All':
-                query += " AND aggressive_normalized_soc_title = ?"
-                params.append(soc_title)
-            query += " ORDER BY EMPLOYER_CITY"
-            cities = con.execute(query, params).fetchdf()['EMPLOYER_CITY'].tolist()
-            
-            # Cleanup after loading cities
-            gc.collect()
-            
-            return cities
+            index = get_filter_index(con)
+            return index.distinct_values('city', {
+                'state': state, 'employer': company, 'year': year, 'soc_title': soc_title
+            })
         except Exception as e:
             st.error(f"Failed to load cities: {e}")
             return []
 
-def get_all_cities():
-    """Get all cities independently"""
-    with st.spinner("Loading all cities..."):
-        try:
-            con = get_db_connection()
-            query = f"SELECT DISTINCT EMPLOYER_CITY FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND EMPLOYER_CITY IS NOT NULL ORDER BY EMPLOYER_CITY"
-            cities = con.execute(query).fetchdf()['EMPLOYER_CITY'].tolist()
-            
-            # Cleanup after loading all cities
-            gc.collect()
-            
-            return cities
-        except Exception as e:
-            st.error(f"Failed to load all cities: {e}")
-            return []
+def load_filtered_data(con, company, year, state, city, soc_title, job_title=None):
+    """Explorer rows for the sidebar selection as an Arrow table (no Streamlit calls - runs on loader threads)"""
+    filters = {
+        'employer': company, 'year': year, 'state': state, 'city': city, 'soc_title': soc_title,
+        'job_title': job_title
+    }
+    # Arrow: cached without copies and read column by column, never as a row-level DataFrame
+    return select_rows(con, EXPLORER_COLUMNS + [JITTER_COLUMN], filters, view='explorer_rows', result='arrow')
 
-def get_all_companies():
-    """Get all companies independently"""
-    with st.spinner("Loading all companies..."):
-        try:
-            con = get_db_connection()
-            query = f"SELECT DISTINCT STD_EMPLOYER_NAME_PARENT FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND STD_EMPLOYER_NAME_PARENT IS NOT NULL ORDER BY STD_EMPLOYER_NAME_PARENT"
-            companies = con.execute(query).fetchdf()['STD_EMPLOYER_NAME_PARENT'].tolist()
-            
-            # Cleanup after loading all companies
-            gc.collect()
-            
-            return companies
-        except Exception as e:
-            st.error(f"Failed to load all companies: {e}")
-            return []
+def load_summary_stats(con, company, year, state, city, soc_title, job_title):
+    """Petition count, wage mean/min/max and petitions per wage level for the sidebar selection
+    as one aggregate row (no Streamlit calls - runs on loader threads)"""
+    filters = {
+        'employer': company, 'year': year, 'state': state, 'city': city, 'soc_title': soc_title,
+        'job_title': job_title
+    }
+    # A single row: latency sensitive, so it is not queued behind the row-level loads
+    return aggregate(
+        con, [],
+        ['petition_count', 'avg_salary', 'min_salary', 'max_salary',
+         'level1_count', 'level2_count', 'level3_count', 'level4_count'],
+        filters, view='summary_stats', priority=PRIORITY_INTERACTIVE
+    )
 
-def get_all_years():
-    """Get all years independently"""
-    with st.spinner("Loading all years..."):
-        try:
-            con = get_db_connection()
-            query = f"SELECT DISTINCT YEAR FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE ORDER BY YEAR"
-            years = con.execute(query).fetchdf()['YEAR'].tolist()
-            
-            # Cleanup after loading all years
-            gc.collect()
-            
-            return years
-        except Exception as e:
-            st.error(f"Failed to load all years: {e}")
-            return []
+def load_company_state_data(con, company, year, soc_title, job_title):
+    """Per-state petitions, salary and wage levels for the map (no Streamlit calls - runs on loader threads)"""
+    # Filter by Company, Year, SOC Title, and Job Title (ignore State and City filters)
+    filters = {
+        'employer': company, 'year': year, 'soc_title': soc_title, 'job_title': job_title,
+        'not_null': ['EMPLOYER_STATE']
+    }
+    df = aggregate(
+        con,
+        [("EMPLOYER_STATE", "state")],
+        ['petition_count', 'avg_salary', 'level1_count', 'level2_count', 'level3_count', 'level4_count'],
+        filters,
+        order_by="petition_count DESC",
+        view='company_states'
+    )
+    
+    # Calculate percentages
+    if not df.empty:
+        total_petitions = df['petition_count'].sum()
+        df['percentage'] = (df['petition_count'] / total_petitions * 100).round(1)
+        df['avg_salary'] = df['avg_salary'].round(0)
+    
+    return df
 
-def get_all_states():
-    """Get all states independently"""
-    with st.spinner("Loading all states..."):
+def get_job_titles(company, soc_title, state, city, year):
+    with st.spinner("Loading job titles..."):
         try:
             con = get_db_connection()
-            query = f"SELECT DISTINCT EMPLOYER_STATE FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND EMPLOYER_STATE IS NOT NULL ORDER BY EMPLOYER_STATE"
-            states = con.execute(query).fetchdf()['EMPLOYER_STATE'].tolist()
-            
-            # Cleanup after loading all states
-            gc.collect()
-            
-            return states
+            index = get_filter_index(con)
+            return index.distinct_values('job_title', {
+                'employer': company, 'soc_title': soc_title, 'state': state, 'city': city, 'year': year
+            })
         except Exception as e:
-            st.error(f"Failed to load all states: {e}")
+            st.error(f"Failed to load job titles: {e}")
             return []
 
-def get_all_soc_titles():
-    """Get all SOC titles independently"""
-    with st.spinner("Loading all SOC titles..."):
-        try:
-            con = get_db_connection()
-            query = f"SELECT DISTINCT aggressive_normalized_soc_title FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND aggressive_normalized_soc_title IS NOT NULL ORDER BY aggressive_normalized_soc_title"
-            soc_titles = con.execute(query).fetchdf()['aggressive_normalized_soc_title'].tolist()
-            
-            # Cleanup after loading all SOC titles
-            gc.collect()
-            
-            return soc_titles
-        except Exception as e:
-            st.error(f"Failed to load all SOC titles: {e}")
-            return []
+def load_yearly_data(con, company, state, city, soc_title):
+    """Grouped rows behind the yearly analysis (no Streamlit calls - runs on loader threads).
 
-def get_filtered_data(company, year, state, city, soc_title):
-    with st.spinner("Loading filtered data..."):
-        try:
-            con = get_db_connection()
-            query = f"SELECT * FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE"
-            params = []
-            if company and company != 'All':
-                query += " AND STD_EMPLOYER_NAME_PARENT = ?"
-                params.append(company)
-            if year:
-                query += " AND YEAR = ?"
-                params.append(year)
-            if state and state != 'All':
-                query += " AND EMPLOYER_STATE = ?"
-                params.append(state)
-            if city and city != 'All':
-                query += " AND EMPLOYER_CITY = ?"
-                params.append(city)
-            if soc_title and soc_title != 'All':
-                query += " AND aggressive_normalized_soc_title = ?"
-                params.append(soc_title)
-            df = con.execute(query, params).fetchdf()
-            
-            # Cleanup resources after data loading
-            gc.collect()
-            
-            return df
-        except Exception as e:
-            st.error(f"Failed to load filtered data: {e}")
-            return pd.DataFrame()
+    Shows all years 2020-2024 regardless of the year filter. Returns one grouped frame from a
+    single GROUPING SETS statement, tagged by grouping_level: 3 = per year, 1 = per (year, wage
+    level), 0 = top 5 occupations per (year, wage level).
+    """
+    # The year filter is deliberately not applied
+    filters = {'employer': company, 'state': state, 'city': city, 'soc_title': soc_title, 'not_null': ['YEAR']}
+    source, params = filtered_source(filters)
+    query = f"""
+    SELECT
+        YEAR,
+        PW_WAGE_LEVEL,
+        aggressive_normalized_soc_title,
+        GROUPING(PW_WAGE_LEVEL, aggressive_normalized_soc_title) AS grouping_level,
+        COUNT(*) AS petition_count,
+        COUNT(PW_WAGE_LEVEL) AS leveled_count,
+        COUNT(PREVAILING_WAGE) AS wage_count,
+        AVG(PREVAILING_WAGE) AS avg_salary,
+        MEDIAN(PREVAILING_WAGE) AS median_salary,
+        MIN(PREVAILING_WAGE) AS min_salary,
+        MAX(PREVAILING_WAGE) AS max_salary
+    {source}
+    GROUP BY GROUPING SETS (
+        (YEAR),
+        (YEAR, PW_WAGE_LEVEL),
+        (YEAR, PW_WAGE_LEVEL, aggressive_normalized_soc_title)
+    )
+    QUALIFY GROUPING(aggressive_normalized_soc_title) = 1 OR (
+        aggressive_normalized_soc_title IS NOT NULL
+        AND ROW_NUMBER() OVER (
+            PARTITION BY YEAR, PW_WAGE_LEVEL, GROUPING(PW_WAGE_LEVEL, aggressive_normalized_soc_title)
+            ORDER BY aggressive_normalized_soc_title IS NULL, COUNT(*) DESC, aggressive_normalized_soc_title
+        ) <= 5
+    )
+    ORDER BY YEAR, grouping_level DESC, PW_WAGE_LEVEL, petition_count DESC
+    """
+    return execute(con, query, params, view='yearly_analysis')
+
+def await_load(future, what):
+    """Wait for a background load from submit_loads, reporting a failure like the loaders do"""
+    try:
+        return future.result()
+    except Exception as e:
+        st.error(f"Failed to load {what}: {e}")
+        return pd.DataFrame()
+
+def load_tab_data(name, load, args, what):
+    """Run one tab's load when the tab is opened and wait for it. Each tab keeps its own
+    session entry, so reopening it under the same filters reuses the load"""
+    return await_load(submit_loads({name: (load, args)}, key=f'{name}_load')[name], what)
+
+def summary_count(summary, column='petition_count'):
+    """A count from the one-row summary load - 0 when there is no row or the count is NULL/NA"""
+    if summary.empty:
+        return 0
+    value = summary[column].iloc[0]
+    return 0 if pd.isna(value) else int(value)
 
-def get_company_state_data(company, year, soc_title, job_title):
-    """Get company data by state for map visualization - respects Company, Year, SOC Title, and Job Title filters only"""
-    with st.spinner("Loading company state data..."):
+def selection_is_empty(loads):
+    """True when the summary load found no petitions for the sidebar selection"""
+    return summary_count(await_load(loads['summary'], "summary stats")) == 0
+
+def column_values(rows, column):
+    """One column of an Arrow table as a NumPy array (nulls as None/NaN, ENUM dictionaries decoded)"""
+    values = rows.column(column)
+    if pa.types.is_dictionary(values.type):
+        values = values.cast(values.type.value_type)
+    return values.to_numpy()
+
+def wage_filter_spec(company, year, state, city, soc_title, job_title):
+    """Filter spec for the wage chart queries: the sidebar selection, rows with a level and a wage only"""
+    return {
+        'employer': company, 'year': year, 'state': state, 'city': city, 'soc_title': soc_title,
+        'job_title': job_title, 'not_null': ['PW_WAGE_LEVEL', 'PREVAILING_WAGE']
+    }
+
+def get_wage_box_stats(company, year, state, city, soc_title, job_title, with_outliers=False):
+    """Box-plot statistics per wage level computed in DuckDB.
+
+    Returns one row per level with q1/median/q3 (linear interpolation, as Plotly uses) and
+    whisker ends at the furthest wages within 1.5 IQR of the quartiles. With with_outliers,
+    also the lowest and highest MAX_OUTLIERS_PER_SIDE wages beyond the whiskers as outliers.
+    """
+    with st.spinner("Computing wage statistics..."):
         try:
             con = get_db_connection()
-            
-            # Build query based on filters - Company, Year, SOC Title, Job Title (not State/City)
+            source, params = filtered_source(wage_filter_spec(company, year, state, city, soc_title, job_title))
+            # Top-N aggregates keep only the most extreme outliers instead of collecting every one
+            outlier_column = f"""LIST_CONCAT(
+                    COALESCE(MIN(PREVAILING_WAGE, {MAX_OUTLIERS_PER_SIDE}) FILTER (WHERE PREVAILING_WAGE < q1 - 1.5 * (q3 - q1)), []),
+                    COALESCE(MAX(PREVAILING_WAGE, {MAX_OUTLIERS_PER_SIDE}) FILTER (WHERE PREVAILING_WAGE > q3 + 1.5 * (q3 - q1)), [])
+                ) AS outliers,""" if with_outliers else ""
             query = f"""
-            SELECT 
-                EMPLOYER_STATE as state,
-                COUNT(*) as petition_count,
-                AVG(PREVAILING_WAGE) as avg_salary,
-                COUNT(CASE WHEN PW_WAGE_LEVEL = 'I' THEN 1 END) as level1_count,
-                COUNT(CASE WHEN PW_WAGE_LEVEL = 'II' THEN 1 END) as level2_count,
-                COUNT(CASE WHEN PW_WAGE_LEVEL = 'III' THEN 1 END) as level3_count,
-                COUNT(CASE WHEN PW_WAGE_LEVEL = 'IV' THEN 1 END) as level4_count
-            FROM {TABLE} 
-            WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE 
-            AND EMPLOYER_STATE IS NOT NULL
+            WITH filtered AS (
+                SELECT PW_WAGE_LEVEL, PREVAILING_WAGE
+                {source}
+            ), quartiles AS (
+                SELECT
+                    PW_WAGE_LEVEL,
+                    QUANTILE_CONT(PREVAILING_WAGE, 0.25) AS q1,
+                    QUANTILE_CONT(PREVAILING_WAGE, 0.5) AS median,
+                    QUANTILE_CONT(PREVAILING_WAGE, 0.75) AS q3
+                FROM filtered
+                GROUP BY PW_WAGE_LEVEL
+            )
+            SELECT
+                PW_WAGE_LEVEL,
+                ANY_VALUE(q1) AS q1,
+                ANY_VALUE(median) AS median,
+                ANY_VALUE(q3) AS q3,
+                MIN(PREVAILING_WAGE) FILTER (WHERE PREVAILING_WAGE >= q1 - 1.5 * (q3 - q1)) AS lowerfence,
+                MAX(PREVAILING_WAGE) FILTER (WHERE PREVAILING_WAGE <= q3 + 1.5 * (q3 - q1)) AS upperfence,
+                {outlier_column}
+                COUNT(*) AS petitions
+            FROM filtered
+            JOIN quartiles USING (PW_WAGE_LEVEL)
+            GROUP BY PW_WAGE_LEVEL
+            ORDER BY PW_WAGE_LEVEL
             """
-            params = []
-            
-            # Filter by Company, Year, SOC Title, and Job Title (ignore State and City filters)
-            if company and company != 'All':
-                query += " AND STD_EMPLOYER_NAME_PARENT = ?"
-                params.append(company)
-            
-            if year:
-                query += " AND YEAR = ?"
-                params.append(int(year))  # Convert to int
-            
-            if soc_title and soc_title != 'All':
-                query += " AND aggressive_normalized_soc_title = ?"
-                params.append(soc_title)
-            
-            if job_title and job_title != 'All':
-                query += " AND NORMALIZED_JOB_TITLE = ?"
-                params.append(job_title)
-            
-            query += " GROUP BY EMPLOYER_STATE ORDER BY petition_count DESC"
-            
-            df = con.execute(query, params).fetchdf()
-            
-            # Calculate percentages
-            if not df.empty:
-                total_petitions = df['petition_count'].sum()
-                df['percentage'] = (df['petition_count'] / total_petitions * 100).round(1)
-                df['avg_salary'] = df['avg_salary'].round(0)
-            
-            return df
+            return execute(con, query, params, view='wage_box_stats')
         except Exception as e:
-            st.error(f"Failed to load company state data: {e}")
+            st.error(f"Failed to load wage statistics: {e}")
             return pd.DataFrame()
 
-def get_job_titles(company, soc_title, state, city, year):
-    with st.spinner("Loading job titles..."):
-        try:
-            con = get_db_connection()
-            query = f"SELECT DISTINCT NORMALIZED_JOB_TITLE FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND NORMALIZED_JOB_TITLE IS NOT NULL"
-            params = []
-            if company and company != 'All':
-                query += " AND STD_EMPLOYER_NAME_PARENT = ?"
-                params.append(company)
-            if soc_title and soc_title != 'All':
-                query += " AND aggressive_normalized_soc_title = ?"
-                params.append(soc_title)
-            if state and state != 'All':
-                query += " AND EMPLOYER_STATE = ?"
-                params.append(state)
-            if city and city != 'All':
-                query += " AND EMPLOYER_CITY = ?"
-                params.append(city)
-            if year:
-                query += " AND YEAR = ?"
-                params.append(year)
-            query += " ORDER BY NORMALIZED_JOB_TITLE"
-            job_titles = con.execute(query, params).fetchdf()['NORMALIZED_JOB_TITLE'].drop_duplicates().tolist()
-            return job_titles
-        except Exception as e:
-            st.error(f"Failed to load job titles: {e}")
-            return []
+def get_wage_density_data(company, year, state, city, soc_title, job_title, bins=WAGE_BINS):
+    """Petition counts per (wage level, wage bin) for the density chart, binned in DuckDB.
 
-def get_soc_titles(company, state, city, year):
-    with st.spinner("Loading SOC titles..."):
+    Bins are equal-width between the 0.5th and 99.5th wage percentiles of the selection;
+    the tails are folded into the edge bins so a few extreme wages cannot flatten the chart.
+    """
+    with st.spinner("Binning wage distribution..."):
         try:
             con = get_db_connection()
-            query = f"SELECT DISTINCT aggressive_normalized_soc_title FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND aggressive_normalized_soc_title IS NOT NULL"
-            params = []
-            if company and company != 'All':
-                query += " AND STD_EMPLOYER_NAME_PARENT = ?"
-                params.append(company)
-            if state and state != 'All':
-                query += " AND EMPLOYER_STATE = ?"
-                params.append(state)
-            if city and city != 'All':
-                query += " AND EMPLOYER_CITY = ?"
-                params.append(city)
-            if year:
-                query += " AND YEAR = ?"
-                params.append(year)
-            query += " ORDER BY aggressive_normalized_soc_title"
-            soc_titles = con.execute(query, params).fetchdf()['aggressive_normalized_soc_title'].tolist()
-            return soc_titles
+            source, params = filtered_source(wage_filter_spec(company, year, state, city, soc_title, job_title))
+            query = f"""
+            WITH filtered AS (
+                SELECT PW_WAGE_LEVEL, PREVAILING_WAGE
+                {source}
+            ), bounds AS (
+                SELECT
+                    QUANTILE_CONT(PREVAILING_WAGE, 0.005) AS low,
+                    QUANTILE_CONT(PREVAILING_WAGE, 0.995) AS high
+                FROM filtered
+            )
+            SELECT
+                PW_WAGE_LEVEL,
+                LEAST(GREATEST(COALESCE(FLOOR((PREVAILING_WAGE - low) * ? / NULLIF(high - low, 0)), 0), 0), ? - 1)::INTEGER AS wage_bin,
+                COUNT(*) AS petitions,
+                ANY_VALUE(low) AS low,
+                ANY_VALUE(high) AS high
+            FROM filtered, bounds
+            GROUP BY ALL
+            ORDER BY PW_WAGE_LEVEL, wage_bin
+            """
+            return execute(con, query, params + [bins, bins], view='wage_density')
         except Exception as e:
-            st.error(f"Failed to load SOC titles: {e}")
-            return []
+            st.error(f"Failed to load wage density: {e}")
+            return pd.DataFrame()
 
-def get_yearly_data(company, state, city, soc_title):
-    """Get data for yearly analysis - shows all years 2020-2024 regardless of filters"""
-    with st.spinner("Loading yearly analysis data..."):
-        try:
-            con = get_db_connection()
-            
-            # Get all years first
-            all_years_query = f"SELECT DISTINCT YEAR FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE ORDER BY YEAR"
-            all_years = con.execute(all_years_query).fetchdf()['YEAR'].tolist()
+def build_wage_figure(rows, company, year, state, city, soc_title, job_title, density_mode):
+    """Wage distribution figure: binned density or one point per LCA, with precomputed boxes (None without data)"""
+    fig = None
+    # Use all data - no sampling
+    # Safe data processing with error handling
+    try:
+        # Ensure required columns exist
+        if 'PW_WAGE_LEVEL' not in rows.column_names or 'PREVAILING_WAGE' not in rows.column_names:
+            st.error("Required columns 'PW_WAGE_LEVEL' or 'PREVAILING_WAGE' not found in data")
+            return None
+        
+        # Identical selections (and chart mode) reuse the serialized figure from any session -
+        # looked up before any column is converted
+        wage_chart_filters = dict(wage_filter_spec(company, year, state, city, soc_title, job_title),
+                                  mode='density' if density_mode else 'points')
+        fig = get_cached_figure('wage_distribution', wage_chart_filters)
+        if fig is None:
+            # Plot straight from the Arrow column arrays - no DataFrame; rows with null values are masked out
+            wages = column_values(rows, 'PREVAILING_WAGE').astype(float)
+            levels = column_values(rows, 'PW_WAGE_LEVEL')
+            valid = ~np.isnan(wages) & pd.notna(levels)
             
-            # Get filtered data for each year
-            all_data = []
-            for year in all_years:
-                query = f"SELECT * FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND YEAR = ?"
-                params = [year]
+            if not valid.any():
+                st.warning("No valid data available for visualization after removing null values")
+            else:
+                wages = wages[valid]
+                # Wage levels as sorted category codes: x position, color and box grouping all index by code
+                level_codes, level_categories = pd.factorize(levels[valid], sort=True)
+                level_categories = list(level_categories)
                 
-                if company and company != 'All':
-                    query += " AND STD_EMPLOYER_NAME_PARENT = ?"
-                    params.append(company)
-                if state and state != 'All':
-                    query += " AND EMPLOYER_STATE = ?"
-                    params.append(state)
-                if city and city != 'All':
-                    query += " AND EMPLOYER_CITY = ?"
-                    params.append(city)
-                if soc_title and soc_title != 'All':
-                    query += " AND aggressive_normalized_soc_title = ?"
-                    params.append(soc_title)
+                # Use professional color scheme
+                color_map = [COLORS['primary'], COLORS['secondary'], COLORS['success'], COLORS['warning'], 
+                            COLORS['info'], '#8c564b', '#e377c2', '#bcbd22']
+                
+                # Box traces from quartiles computed in DuckDB - no wage vectors in the figure
+                box_stats = get_wage_box_stats(company, year, state, city, soc_title, job_title,
+                                               with_outliers=density_mode)
+                box_traces = []
+                for row in box_stats.itertuples(index=False):
+                    if row.PW_WAGE_LEVEL not in level_categories:
+                        continue
+                    i = level_categories.index(row.PW_WAGE_LEVEL)
+                    box_traces.append(go.Box(
+                        x=[i], q1=[row.q1], median=[row.median], q3=[row.q3],
+                        lowerfence=[row.lowerfence], upperfence=[row.upperfence], name=str(row.PW_WAGE_LEVEL),
+                        marker_color=color_map[i % len(color_map)],
+                        boxpoints=False, opacity=0.3, showlegend=True
+                    ))
+                
+                if density_mode:
+                    # Binned in DuckDB: WAGE_BINS x levels cells plus at most 2 x MAX_OUTLIERS_PER_SIDE
+                    # outlier markers per level, whatever the company size
+                    density_df = get_wage_density_data(company, year, state, city, soc_title, job_title)
+                    bin_low = density_df['low'].iloc[0] if not density_df.empty else 0
+                    bin_width = (density_df['high'].iloc[0] - bin_low) / WAGE_BINS if not density_df.empty else 0
+                    density = np.full((WAGE_BINS, len(level_categories)), np.nan)
+                    level_index = pd.Index(level_categories).get_indexer(density_df['PW_WAGE_LEVEL'])
+                    known = level_index >= 0
+                    density[density_df['wage_bin'].to_numpy()[known], level_index[known]] = density_df['petitions'].to_numpy()[known]
+                    
+                    # The most extreme outliers beyond the whiskers as markers; the heatmap folds all of them into its edge bands
+                    outlier_traces = []
+                    for row in box_stats.itertuples(index=False):
+                        if row.PW_WAGE_LEVEL in level_categories and len(row.outliers) > 0:
+                            i = level_categories.index(row.PW_WAGE_LEVEL)
+                            outlier_traces.append(go.Scatter(
+                                x=np.full(len(row.outliers), i), y=np.asarray(row.outliers, dtype=float),
+                                mode='markers', marker=dict(size=4, opacity=0.6, color=color_map[i % len(color_map)]),
+                                hovertemplate="Outlier: $%{y:,.0f}<extra></extra>", showlegend=False
+                            ))
+                    
+                    fig = go.Figure(data=[go.Heatmap(
+                        x=np.arange(len(level_categories)),
+                        y=bin_low + (np.arange(WAGE_BINS) + 0.5) * bin_width,
+                        z=density,
+                        colorscale='Viridis',
+                        colorbar=dict(title="Petitions"),
+                        hovertemplate="Salary band: ~$%{y:,.0f}<br>Petitions: %{z:,}<extra></extra>",
+                        name='Petition Density'
+                    )] + box_traces + outlier_traces)
+                    plot_title = "Wage Density by Wage Level (Binned Lottery LCAs)"
+                else:
+                    job_title_values = column_values(rows, 'NORMALIZED_JOB_TITLE')[valid]
+                    x_jitter = level_codes + column_values(rows, 'x_jitter').astype(float)[valid]
+                    
+                    # Color by level code through a stepped colorscale: one number per point instead of a color string
+                    level_colors = [color_map[i % len(color_map)] for i in range(len(level_categories))]
+                    colorscale = []
+                    for i, color in enumerate(level_colors):
+                        colorscale += [[i / len(level_colors), color], [(i + 1) / len(level_colors), color]]
+                    
+                    # Create scatter trace
+                    marker_size = 4 if len(wages) > 10000 else 6
+                    marker_opacity = 0.4 if len(wages) > 10000 else 0.6
+                    
+                    # Hover reads job titles from customdata, so Plotly.js formats the text - no per-point strings
+                    scatter = go.Scatter(
+                        x=x_jitter,
+                        y=wages,
+                        mode='markers',
+                        marker=dict(size=marker_size, opacity=marker_opacity, color=level_codes,
+                                    colorscale=colorscale, cmin=-0.5, cmax=len(level_colors) - 0.5),
+                        customdata=job_title_values,
+                        hovertemplate="Salary: $%{y:,.0f}<br>Job Title: %{customdata}<extra></extra>",
+                        name='LCA Points',
+                        showlegend=False
+                    )
+                    
+                    # Create figure
+                    fig = go.Figure(data=box_traces + [scatter])
+                    plot_title = "Wage Distribution by Wage Level (Each Point = Lottery LCA)"
+                
+                # Layout
+                layout_kwargs = {
+                    "title": plot_title,
+                    "xaxis": dict(
+                        tickvals=list(range(len(level_categories))),
+                        ticktext=level_categories,
+                        title="Wage Level"
+                    ),
+                    "yaxis": dict(title="Wage", tickformat=",.0f"),
+                    "legend_title_text": "Wage Level",
+                    "uirevision": True,
+                    "hovermode": 'closest'
+                }
                 
-                year_data = con.execute(query, params).fetchdf()
-                all_data.append(year_data)
-            
-            # Combine all years
-            if all_data:
-                df = pd.concat(all_data, ignore_index=True)
-            else:
-                df = pd.DataFrame()
-            
-            # Cleanup resources after data loading
-            gc.collect()
-            
-            return df
-        except Exception as e:
-            st.error(f"Failed to load yearly data: {e}")
-            return pd.DataFrame()
 
-# Background rendering functions for each tab
-def render_wage_distribution_tab(df, fig, config):
-    """Render wage distribution tab content"""
-    # Ensure config is not None
-    if config is None:
-        config = {}
-    
+                
+                fig.update_layout(**layout_kwargs)
+                cache_figure('wage_distribution', wage_chart_filters, fig)
+    except Exception as e:
+        st.error(f"Error processing data for visualization: {e}")
+        fig = None
+    return fig
+
+def render_wage_distribution_tab(rows, company, year, state, city, soc_title, job_title):
+    """Render wage distribution tab content from the explorer rows (an Arrow table)"""
     # Petitions by Wage Level table - FIRST
     st.subheader("Petitions by Wage Level")
     st.markdown("📊 **What this shows**: Breakdown of how many H-1B petitions this company filed for each wage level (I-IV). Level I = entry-level, Level IV = senior positions.")
-    if not df.empty and len(df) > 0:
+    if len(rows) > 0:
         try:
-            wage_level_counts = df['PW_WAGE_LEVEL'].value_counts().reset_index()
-            wage_level_counts.columns = ['Wage Level', 'Number of Petitions']
-            wage_level_counts = wage_level_counts.sort_values('Wage Level')
-            wage_level_counts['Percentage'] = (wage_level_counts['Number of Petitions'] / len(df) * 100).round(2)
+            levels = column_values(rows, 'PW_WAGE_LEVEL')
+            level_names, level_counts = np.unique(levels[pd.notna(levels)].astype(str), return_counts=True)
+            wage_level_counts = pd.DataFrame({'Wage Level': level_names, 'Number of Petitions': level_counts})
+            wage_level_counts['Percentage'] = (wage_level_counts['Number of Petitions'] / len(rows) * 100).round(2)
             
             # Add total row
             total_row = pd.DataFrame({
                 'Wage Level': ['Total'],
-                'Number of Petitions': [len(df)],
+                'Number of Petitions': [len(rows)],
                 'Percentage': [100.0]
             })
             wage_level_counts = pd.concat([wage_level_counts, total_row], ignore_index=True)
@@ -396,115 +491,127 @@ def render_wage_distribution_tab(df, fig, config):
         st.warning("No data available for analysis.")
     
     # Wage Distribution graph - SECOND
-    st.subheader("Wage Distribution by Wage Level (Each Point = Lottery LCA)")
-    st.markdown("📈 **What this shows**: Visual distribution of salaries across wage levels. Each point represents an individual H-1B petition. Higher wage levels generally mean higher salaries and more senior positions.")
+    show_points = False
+    if len(rows) > DENSITY_THRESHOLD:
+        show_points = st.toggle("Show individual points", key='show_raw_points',
+                                help=f"Selections above {DENSITY_THRESHOLD:,} petitions are drawn as a binned density; turn this on to plot every LCA")
+    density_mode = len(rows) > DENSITY_THRESHOLD and not show_points
+    if density_mode:
+        st.subheader("Wage Density by Wage Level (Binned Lottery LCAs)")
+        st.markdown("📈 **What this shows**: Visual distribution of salaries across wage levels. Each cell counts the H-1B petitions in a salary band - darker cells hold more petitions. Higher wage levels generally mean higher salaries and more senior positions.")
+    else:
+        st.subheader("Wage Distribution by Wage Level (Each Point = Lottery LCA)")
+        st.markdown("📈 **What this shows**: Visual distribution of salaries across wage levels. Each point represents an individual H-1B petition. Higher wage levels generally mean higher salaries and more senior positions.")
+    fig = build_wage_figure(rows, company, year, state, city, soc_title, job_title, density_mode)
     if fig is not None:
-        st.plotly_chart(fig, use_container_width=True, config=config)
+        st.plotly_chart(fig, use_container_width=True, config=CHART_CONFIG)
     else:
         st.warning("No data available for visualization.")
 
-def render_top_occupations_tab(df):
+def get_top_paid_occupations(company, year, state, city, soc_title, job_title, per_level=3, min_petitions=5):
+    """Highest average-wage SOC titles per wage level in one windowed statement.
+
+    Occupations need at least min_petitions wages in a level; ties keep SOC title order.
+    """
+    with st.spinner("Loading top occupations..."):
+        try:
+            con = get_db_connection()
+            filters = {
+                'employer': company, 'year': year, 'state': state, 'city': city, 'soc_title': soc_title,
+                'job_title': job_title, 'not_null': ['PW_WAGE_LEVEL', 'aggressive_normalized_soc_title']
+            }
+            source, params = filtered_source(filters)
+            query = f"""
+            SELECT
+                PW_WAGE_LEVEL,
+                aggressive_normalized_soc_title,
+                AVG(PREVAILING_WAGE) AS avg_salary,
+                COUNT(PREVAILING_WAGE) AS petitions
+            {source}
+            GROUP BY PW_WAGE_LEVEL, aggressive_normalized_soc_title
+            HAVING COUNT(PREVAILING_WAGE) >= ?
+            QUALIFY row_number() OVER (
+                PARTITION BY PW_WAGE_LEVEL ORDER BY avg_salary DESC, aggressive_normalized_soc_title
+            ) <= ?
+            ORDER BY PW_WAGE_LEVEL, avg_salary DESC, aggressive_normalized_soc_title
+            """
+            return execute(con, query, params + [min_petitions, per_level], view='top_paid_occupations')
+        except Exception as e:
+            st.error(f"Failed to load top occupations: {e}")
+            return pd.DataFrame()
+
+def render_top_occupations_tab(company, year, state, city, soc_title, job_title):
     """Render top occupations tab content"""
     st.subheader("💰 Highest Paid Occupations by Wage Level")
     st.markdown("💼 **What this shows**: The highest-paying job categories for each wage level at this company. This helps identify which roles command the highest salaries within each experience level.")
     
-    if not df.empty and len(df) > 0:
-        try:
-            # Get top 3 highest paid occupations for each wage level
-            top_paid_occupations = {}
-            for level in sorted(df['PW_WAGE_LEVEL'].unique()):
-                level_data = df[df['PW_WAGE_LEVEL'] == level]
-                # Group by occupation and calculate average salary
-                occ_salary = level_data.groupby('aggressive_normalized_soc_title')['PREVAILING_WAGE'].agg(['mean', 'count']).reset_index()
-                occ_salary = occ_salary[occ_salary['count'] >= 5]  # Only occupations with at least 5 petitions
-                if not occ_salary.empty:
-                    top_paid = occ_salary.nlargest(3, 'mean')
-                    top_paid_occupations[f'Level {level}'] = top_paid
-            
-            # Create a comprehensive table
-            if top_paid_occupations:
-                occupation_df = pd.DataFrame()
-                for level, occupations in top_paid_occupations.items():
-                    temp_df = pd.DataFrame({
-                        'Wage Level': level,
-                        'Occupation': occupations['aggressive_normalized_soc_title'],
-                        'Average Salary': occupations['mean'].round(0).astype(int),
-                        'Number of Petitions': occupations['count']
-                    })
-                    occupation_df = pd.concat([occupation_df, temp_df], ignore_index=True)
-                
-                st.dataframe(occupation_df, use_container_width=True)
-            else:
-                st.warning("No occupations found with sufficient data (minimum 5 petitions per occupation).")
-        except Exception as e:
-            st.warning(f"Could not display top occupations: {e}")
+    # Get top 3 highest paid occupations for each wage level (only occupations with at least 5 petitions)
+    top_paid = get_top_paid_occupations(company, year, state, city, soc_title, job_title)
+    if not top_paid.empty:
+        occupation_df = pd.DataFrame({
+            'Wage Level': 'Level ' + top_paid['PW_WAGE_LEVEL'].astype(str),
+            'Occupation': top_paid['aggressive_normalized_soc_title'],
+            'Average Salary': top_paid['avg_salary'].round(0).astype(int),
+            'Number of Petitions': top_paid['petitions']
+        })
+        st.dataframe(occupation_df, use_container_width=True)
     else:
-        st.warning("No data available for analysis.")
+        st.warning("No occupations found with sufficient data (minimum 5 petitions per occupation).")
 
+WAGE_LEVELS = ['I', 'II', 'III', 'IV']
+
+@st.cache_data(max_entries=64, show_spinner=False)
 def process_yearly_analysis_data(yearly_df):
-    """Process yearly analysis data - cached function for expensive computations"""
+    """Process yearly analysis data - memoized on the content of the grouped rows from load_yearly_data"""
     if yearly_df.empty or len(yearly_df) == 0:
         return None, None, None, None, None
     
-    # Process wage level trends data
-    yearly_wage_data = yearly_df.groupby(['YEAR', 'PW_WAGE_LEVEL']).size().reset_index(name='count')
-    yearly_wage_pivot = yearly_wage_data.pivot(index='YEAR', columns='PW_WAGE_LEVEL', values='count').fillna(0)
+    year_rows = yearly_df[yearly_df['grouping_level'] == 3].set_index('YEAR')
+    level_rows = yearly_df[(yearly_df['grouping_level'] == 1) & yearly_df['PW_WAGE_LEVEL'].notna()]
+    occupation_rows = yearly_df[yearly_df['grouping_level'] == 0]
+    
+    # Process wage level trends data: one year x level crosstab feeds the trend and impact tables
+    yearly_wage_pivot = level_rows.pivot(index='YEAR', columns='PW_WAGE_LEVEL', values='petition_count').fillna(0)
     yearly_wage_pct = yearly_wage_pivot.div(yearly_wage_pivot.sum(axis=1), axis=0) * 100
     
     # Process salary trends data
-    salary_trends = yearly_df.groupby(['YEAR', 'PW_WAGE_LEVEL'])['PREVAILING_WAGE'].agg(['mean', 'median', 'count']).reset_index()
+    salary_trends = level_rows[['YEAR', 'PW_WAGE_LEVEL', 'avg_salary', 'median_salary', 'wage_count']].reset_index(drop=True)
     salary_trends.columns = ['Year', 'Wage Level', 'Average Salary', 'Median Salary', 'Count']
     
     # Process yearly statistics
-    yearly_stats = yearly_df.groupby('YEAR').agg({
-        'PW_WAGE_LEVEL': 'count',
-        'PREVAILING_WAGE': ['mean', 'median', 'min', 'max']
-    }).round(0)
+    yearly_stats = year_rows[['leveled_count', 'avg_salary', 'median_salary', 'min_salary', 'max_salary']].round(0)
     yearly_stats.columns = ['Total Petitions', 'Avg Salary', 'Median Salary', 'Min Salary', 'Max Salary']
     
-    # Process policy impact data
-    yearly_impact = []
-    for year in sorted(yearly_df['YEAR'].unique()):
-        year_data = yearly_df[yearly_df['YEAR'] == year]
-        total = len(year_data)
-        level1 = len(year_data[year_data['PW_WAGE_LEVEL'] == 'I'])
-        level2 = len(year_data[year_data['PW_WAGE_LEVEL'] == 'II'])
-        level3 = len(year_data[year_data['PW_WAGE_LEVEL'] == 'III'])
-        level4 = len(year_data[year_data['PW_WAGE_LEVEL'] == 'IV'])
-        
-        yearly_impact.append({
-            'Year': year,
-            'Total Petitions': total,
-            'Level I Count': level1,
-            'Level I %': round(level1/total*100, 1),
-            'Level II Count': level2,
-            'Level II %': round(level2/total*100, 1),
-            'Level III Count': level3,
-            'Level III %': round(level3/total*100, 1),
-            'Level IV Count': level4,
-            'Level IV %': round(level4/total*100, 1),
-            'At Risk (I+II)': level1 + level2,
-            'At Risk %': round((level1 + level2)/total*100, 1)
-        })
+    # Process policy impact data - whole columns at once instead of per-year slices
+    totals = year_rows['petition_count']
+    level_counts = yearly_wage_pivot.reindex(index=totals.index, columns=WAGE_LEVELS, fill_value=0).fillna(0).astype(int)
+    level_pct = level_counts.div(totals, axis=0).mul(100).round(1)
+    at_risk = level_counts['I'] + level_counts['II']
+    impact = pd.DataFrame({'Year': totals.index, 'Total Petitions': totals.values})
+    for level in WAGE_LEVELS:
+        impact[f'Level {level} Count'] = level_counts[level].values
+        impact[f'Level {level} %'] = level_pct[level].values
+    impact['At Risk (I+II)'] = at_risk.values
+    impact['At Risk %'] = (at_risk / totals * 100).round(1).values
+    yearly_impact = impact.to_dict('records')
     
-    # Process top occupations data
+    # Process top occupations data: top 5 per (year, level) among levels with enough data
+    eligible = level_rows.loc[level_rows['petition_count'] >= 10, ['YEAR', 'PW_WAGE_LEVEL']]  # Only if we have enough data
+    candidates = occupation_rows.merge(eligible, on=['YEAR', 'PW_WAGE_LEVEL'])
+    top_counts = candidates.groupby(['YEAR', 'PW_WAGE_LEVEL'], sort=True)['petition_count'].nlargest(5)
+    top_occupations = candidates.loc[top_counts.index.get_level_values(-1)]
     yearly_occupations = {}
-    for year in sorted(yearly_df['YEAR'].unique()):
-        year_data = yearly_df[yearly_df['YEAR'] == year]
-        for level in sorted(year_data['PW_WAGE_LEVEL'].unique()):
-            level_data = year_data[year_data['PW_WAGE_LEVEL'] == level]
-            if len(level_data) >= 10:  # Only if we have enough data
-                top_occ = level_data['aggressive_normalized_soc_title'].value_counts().head(5)
-                yearly_occupations[f'{year}_Level_{level}'] = {
-                    'Year': year,
-                    'Wage Level': level,
-                    'Top Occupations': top_occ.to_dict()
-                }
+    for (year, level), group in top_occupations.groupby(['YEAR', 'PW_WAGE_LEVEL'], sort=True):
+        yearly_occupations[f'{year}_Level_{level}'] = {
+            'Year': year,
+            'Wage Level': level,
+            'Top Occupations': dict(zip(group['aggressive_normalized_soc_title'], group['petition_count']))
+        }
     
     return yearly_wage_pct, salary_trends, yearly_stats, yearly_impact, yearly_occupations
 
-def render_yearly_analysis_tab(yearly_df, config):
-    """Render yearly analysis tab content"""
+def render_yearly_analysis_tab(yearly_df, config, filters):
+    """Render yearly analysis tab content (filters: the selection yearly_df was loaded for, keys the figure cache)"""
     st.subheader("📈 Yearly Trends & Policy Impact Analysis")
     
     # Ensure config is not None
@@ -529,35 +636,38 @@ def render_yearly_analysis_tab(yearly_df, config):
                 st.markdown("**Wage Level Distribution Trends (2020-2024)**")
                 st.markdown("📊 **What this shows**: How the company's hiring mix across wage levels has changed over time. This reveals whether they're hiring more entry-level or senior positions.")
                 
-                fig_yearly_trend = go.Figure()
-                # Professional color mapping for wage levels
-                level_colors = {
-                    'I': COLORS['warning'],      # Red for Level I (entry level)
-                    'II': COLORS['secondary'],   # Orange for Level II
-                    'III': COLORS['primary'],    # Blue for Level III
-                    'IV': COLORS['success']      # Green for Level IV (senior)
-                }
+                fig_yearly_trend = get_cached_figure('yearly_wage_level_trend', filters)
+                if fig_yearly_trend is None:
+                    fig_yearly_trend = go.Figure()
+                    # Professional color mapping for wage levels
+                    level_colors = {
+                        'I': COLORS['warning'],      # Red for Level I (entry level)
+                        'II': COLORS['secondary'],   # Orange for Level II
+                        'III': COLORS['primary'],    # Blue for Level III
+                        'IV': COLORS['success']      # Green for Level IV (senior)
+                    }
                 
-                for level in yearly_wage_pct.columns:
-                    fig_yearly_trend.add_trace(go.Scatter(
-                        x=yearly_wage_pct.index,
-                        y=yearly_wage_pct[level],
-                        mode='lines+markers',
-                        name=f'Level {level}',
-                        line=dict(width=3, color=level_colors.get(level, COLORS['info'])),
-                        marker=dict(size=8, color=level_colors.get(level, COLORS['info']))
-                    ))
+                    for level in yearly_wage_pct.columns:
+                        fig_yearly_trend.add_trace(go.Scatter(
+                            x=yearly_wage_pct.index,
+                            y=yearly_wage_pct[level],
+                            mode='lines+markers',
+                            name=f'Level {level}',
+                            line=dict(width=3, color=level_colors.get(level, COLORS['info'])),
+                            marker=dict(size=8, color=level_colors.get(level, COLORS['info']))
+                        ))
                 
 
                 
-                fig_yearly_trend.update_layout(
-                    title="H-1B Lottery Petitions by Wage Level Over Time",
-                    xaxis_title="Year",
-                    yaxis_title="Percentage of Petitions (%)",
-                    legend_title="Wage Level",
-                    hovermode='x unified',
-                    height=400
-                )
+                    fig_yearly_trend.update_layout(
+                        title="H-1B Lottery Petitions by Wage Level Over Time",
+                        xaxis_title="Year",
+                        yaxis_title="Percentage of Petitions (%)",
+                        legend_title="Wage Level",
+                        hovermode='x unified',
+                        height=400
+                    )
+                    cache_figure('yearly_wage_level_trend', filters, fig_yearly_trend)
                 st.plotly_chart(fig_yearly_trend, use_container_width=True, config=config)
         
             with tab2:
@@ -565,36 +675,39 @@ def render_yearly_analysis_tab(yearly_df, config):
                 st.markdown("💰 **What this shows**: How average salaries for each wage level have changed over time. This indicates whether the company is paying more competitively or if salaries are stagnating.")
                 
                 # Create salary trend chart
-                fig_salary_trend = go.Figure()
-                # Professional color mapping for wage levels
-                level_colors = {
-                    'I': COLORS['warning'],      # Red for Level I (entry level)
-                    'II': COLORS['secondary'],   # Orange for Level II
-                    'III': COLORS['primary'],    # Blue for Level III
-                    'IV': COLORS['success']      # Green for Level IV (senior)
-                }
+                fig_salary_trend = get_cached_figure('yearly_salary_trend', filters)
+                if fig_salary_trend is None:
+                    fig_salary_trend = go.Figure()
+                    # Professional color mapping for wage levels
+                    level_colors = {
+                        'I': COLORS['warning'],      # Red for Level I (entry level)
+                        'II': COLORS['secondary'],   # Orange for Level II
+                        'III': COLORS['primary'],    # Blue for Level III
+                        'IV': COLORS['success']      # Green for Level IV (senior)
+                    }
                 
-                for level in sorted(yearly_df['PW_WAGE_LEVEL'].unique()):
-                    level_data = salary_trends[salary_trends['Wage Level'] == level]
-                    fig_salary_trend.add_trace(go.Scatter(
-                        x=level_data['Year'],
-                        y=level_data['Average Salary'],
-                        mode='lines+markers',
-                        name=f'Level {level} (Avg)',
-                        line=dict(width=3, color=level_colors.get(level, COLORS['info'])),
-                        marker=dict(size=8, color=level_colors.get(level, COLORS['info']))
-                    ))
+                    for level in sorted(salary_trends['Wage Level'].unique()):
+                        level_data = salary_trends[salary_trends['Wage Level'] == level]
+                        fig_salary_trend.add_trace(go.Scatter(
+                            x=level_data['Year'],
+                            y=level_data['Average Salary'],
+                            mode='lines+markers',
+                            name=f'Level {level} (Avg)',
+                            line=dict(width=3, color=level_colors.get(level, COLORS['info'])),
+                            marker=dict(size=8, color=level_colors.get(level, COLORS['info']))
+                        ))
                 
 
                 
-                fig_salary_trend.update_layout(
-                    title="Average Salary Trends by Wage Level Over Time",
-                    xaxis_title="Year",
-                    yaxis_title="Average Salary ($)",
-                    yaxis=dict(tickformat=",.0f"),
-                    legend_title="Wage Level",
-                    height=400
-                )
+                    fig_salary_trend.update_layout(
+                        title="Average Salary Trends by Wage Level Over Time",
+                        xaxis_title="Year",
+                        yaxis_title="Average Salary ($)",
+                        yaxis=dict(tickformat=",.0f"),
+                        legend_title="Wage Level",
+                        height=400
+                    )
+                    cache_figure('yearly_salary_trend', filters, fig_salary_trend)
                 st.plotly_chart(fig_salary_trend, use_container_width=True, config=config)
             
             with tab3:
@@ -621,7 +734,7 @@ def render_yearly_analysis_tab(yearly_df, config):
     else:
         st.warning("No data available for yearly analysis.")
 
-def render_us_map_tab(company, year, soc_title, job_title):
+def render_us_map_tab(company, year, soc_title, job_title, state_data):
     """Render US map visualization tab - respects Company, Year, SOC Title, and Job Title filters only"""
     st.subheader("🗺️ US Geographic Distribution")
     st.info("💡 **Note:** This map shows data across ALL states, respecting Company, Year, SOC Title, and Job Title filters (State and City filters are ignored for geographic visualization).")
@@ -643,8 +756,7 @@ def render_us_map_tab(company, year, soc_title, job_title):
     else:
         st.write("No filters applied - showing all data")
     
-    # Get company state data
-    state_data = get_company_state_data(company, year, soc_title, job_title)
+    map_filters = {'employer': company, 'year': year, 'soc_title': soc_title, 'job_title': job_title}
     
     if state_data.empty:
         st.warning("No geographic data available for the selected filters.")
@@ -662,36 +774,39 @@ def render_us_map_tab(company, year, soc_title, job_title):
         st.markdown("🗺️ **What this shows**: Geographic distribution of H-1B petitions across US states. Darker colors indicate more petitions, helping identify where this company has the strongest presence.")
         
         # Create choropleth map for petition count
-        fig_map = px.choropleth(
-            state_data,
-            locations='state',
-            locationmode='USA-states',
-            color='petition_count',
-            hover_name='state',
-            hover_data={
-                'state': False,
-                'petition_count': True,
-                'percentage': True,
-                'avg_salary': True
-            },
-            color_continuous_scale='Blues',
-            title=f"H-1B Lottery Petitions by State{f' - {company}' if company != 'All' else ''}{f' ({year})' if year else ''}",
-            labels={'petition_count': 'Petitions', 'percentage': '% of Total', 'avg_salary': 'Avg Salary'}
-        )
+        fig_map = get_cached_figure('state_map_petitions', map_filters)
+        if fig_map is None:
+            fig_map = px.choropleth(
+                state_data,
+                locations='state',
+                locationmode='USA-states',
+                color='petition_count',
+                hover_name='state',
+                hover_data={
+                    'state': False,
+                    'petition_count': True,
+                    'percentage': True,
+                    'avg_salary': True
+                },
+                color_continuous_scale='Blues',
+                title=f"H-1B Lottery Petitions by State{f' - {company}' if company != 'All' else ''}{f' ({year})' if year else ''}",
+                labels={'petition_count': 'Petitions', 'percentage': '% of Total', 'avg_salary': 'Avg Salary'}
+            )
         
-        # Apply styling
-        fig_map.update_layout(
-            geo=dict(
-                bgcolor='white',
-                landcolor='#f8f9fa',
-                coastlinecolor=COLORS['border'],
-                showland=True,
-                showcoastlines=True,
-                projection_type='albers usa'
+            # Apply styling
+            fig_map.update_layout(
+                geo=dict(
+                    bgcolor='white',
+                    landcolor='#f8f9fa',
+                    coastlinecolor=COLORS['border'],
+                    showland=True,
+                    showcoastlines=True,
+                    projection_type='albers usa'
+                )
             )
-        )
         
-        fig_map.update_layout(height=500)
+            fig_map.update_layout(height=500)
+            cache_figure('state_map_petitions', map_filters, fig_map)
         st.plotly_chart(fig_map, use_container_width=True)
         
         # Show top states table
@@ -705,36 +820,39 @@ def render_us_map_tab(company, year, soc_title, job_title):
         st.markdown("💰 **What this shows**: Average H-1B salaries by state for this company. Darker colors indicate higher salaries, helping identify which locations offer the best compensation.")
         
         # Create choropleth map for average salary
-        fig_salary_map = px.choropleth(
-            state_data,
-            locations='state',
-            locationmode='USA-states',
-            color='avg_salary',
-            hover_name='state',
-            hover_data={
-                'state': False,
-                'avg_salary': True,
-                'petition_count': True,
-                'percentage': True
-            },
-            color_continuous_scale='Greens',
-            title=f"Average Salary by State{f' - {company}' if company != 'All' else ''}{f' ({year})' if year else ''}",
-            labels={'avg_salary': 'Avg Salary ($)', 'petition_count': 'Petitions', 'percentage': '% of Total'}
-        )
+        fig_salary_map = get_cached_figure('state_map_salary', map_filters)
+        if fig_salary_map is None:
+            fig_salary_map = px.choropleth(
+                state_data,
+                locations='state',
+                locationmode='USA-states',
+                color='avg_salary',
+                hover_name='state',
+                hover_data={
+                    'state': False,
+                    'avg_salary': True,
+                    'petition_count': True,
+                    'percentage': True
+                },
+                color_continuous_scale='Greens',
+                title=f"Average Salary by State{f' - {company}' if company != 'All' else ''}{f' ({year})' if year else ''}",
+                labels={'avg_salary': 'Avg Salary ($)', 'petition_count': 'Petitions', 'percentage': '% of Total'}
+            )
         
-        # Apply styling
-        fig_salary_map.update_layout(
-            geo=dict(
-                bgcolor='white',
-                landcolor='#f8f9fa',
-                coastlinecolor=COLORS['border'],
-                showland=True,
-                showcoastlines=True,
-                projection_type='albers usa'
+            # Apply styling
+            fig_salary_map.update_layout(
+                geo=dict(
+                    bgcolor='white',
+                    landcolor='#f8f9fa',
+                    coastlinecolor=COLORS['border'],
+                    showland=True,
+                    showcoastlines=True,
+                    projection_type='albers usa'
+                )
             )
-        )
         
-        fig_salary_map.update_layout(height=500)
+            fig_salary_map.update_layout(height=500)
+            cache_figure('state_map_salary', map_filters, fig_salary_map)
         st.plotly_chart(fig_salary_map, use_container_width=True)
         
         # Show salary statistics
@@ -769,19 +887,22 @@ def render_us_map_tab(company, year, soc_title, job_title):
                 'Level IV': COLORS['success']      # Green for Level IV
             }
             
-            fig_wage_dist = px.bar(
-                wage_df,
-                x='state',
-                y='count',
-                color='wage_level',
-                color_discrete_map=level_colors,
-                title=f"Wage Level Distribution by State{f' - {company}' if company != 'All' else ''}{f' ({year})' if year else ''}",
-                labels={'count': 'Number of Petitions', 'state': 'State', 'wage_level': 'Wage Level'}
-            )
+            fig_wage_dist = get_cached_figure('state_map_wage_levels', map_filters)
+            if fig_wage_dist is None:
+                fig_wage_dist = px.bar(
+                    wage_df,
+                    x='state',
+                    y='count',
+                    color='wage_level',
+                    color_discrete_map=level_colors,
+                    title=f"Wage Level Distribution by State{f' - {company}' if company != 'All' else ''}{f' ({year})' if year else ''}",
+                    labels={'count': 'Number of Petitions', 'state': 'State', 'wage_level': 'Wage Level'}
+                )
             
 
             
-            fig_wage_dist.update_layout(height=500, xaxis_tickangle=-45)
+                fig_wage_dist.update_layout(height=500, xaxis_tickangle=-45)
+                cache_figure('state_map_wage_levels', map_filters, fig_wage_dist)
             st.plotly_chart(fig_wage_dist, use_container_width=True)
             
             # Show wage level summary
@@ -798,22 +919,47 @@ def render_us_map_tab(company, year, soc_title, job_title):
         else:
             st.warning("No wage level data available for the selected filters.")
 
-def render_policy_summary_tab(df):
-    """Render policy summary tab content"""
+# Columns of the example LCA shown for each wage level's minimum wage
+MIN_WAGE_EXAMPLE_COLUMNS = ['CASE_NUMBER', 'EMPLOYER_NAME', 'JOB_TITLE', 'EMPLOYER_CITY', 'EMPLOYER_STATE']
+
+def get_min_wage_examples(company, year, state, city, soc_title, job_title):
+    """Lowest wage per wage level with one example LCA each - four rows, picked in DuckDB with arg_min"""
+    with st.spinner("Loading min wage examples..."):
+        try:
+            con = get_db_connection()
+            source, params = filtered_source(wage_filter_spec(company, year, state, city, soc_title, job_title))
+            example = ', '.join(f"'{column}': {column}" for column in ['PREVAILING_WAGE'] + MIN_WAGE_EXAMPLE_COLUMNS)
+            # One struct per level keeps the example columns from the same row; ties go to the lowest case number
+            query = f"""
+            SELECT PW_WAGE_LEVEL, example.*
+            FROM (
+                SELECT PW_WAGE_LEVEL, arg_min({{{example}}}, (PREVAILING_WAGE, CASE_NUMBER)) AS example
+                {source}
+                GROUP BY PW_WAGE_LEVEL
+            )
+            ORDER BY PW_WAGE_LEVEL
+            """
+            return execute(con, query, params, view='min_wage_examples')
+        except Exception as e:
+            st.error(f"Failed to load min wage examples: {e}")
+            return pd.DataFrame()
+
+def render_policy_summary_tab(summary, company, year, state, city, soc_title, job_title):
+    """Render policy summary tab content from the summary load's counts"""
     st.subheader("📋 Policy Impact Summary")
     st.markdown("📋 **What this shows**: Analysis of how recent H-1B policy changes (especially the wage-based selection rule) might impact this company's hiring patterns and what it means for job seekers.")
     
     # Check if we have data
-    if df.empty:
+    if summary.empty:
         st.warning("No data available for policy analysis.")
         return
     
     # Calculate what the new policy would mean
-    total_petitions = len(df)
-    level1_petitions = len(df[df['PW_WAGE_LEVEL'] == 'I'])
-    level2_petitions = len(df[df['PW_WAGE_LEVEL'] == 'II'])
-    level3_petitions = len(df[df['PW_WAGE_LEVEL'] == 'III'])
-    level4_petitions = len(df[df['PW_WAGE_LEVEL'] == 'IV'])
+    total_petitions = summary_count(summary)
+    level1_petitions = summary_count(summary, 'level1_count')
+    level2_petitions = summary_count(summary, 'level2_count')
+    level3_petitions = summary_count(summary, 'level3_count')
+    level4_petitions = summary_count(summary, 'level4_count')
     
     # Calculate percentages safely
     level1_pct = (level1_petitions/total_petitions*100) if total_petitions > 0 else 0
@@ -839,11 +985,9 @@ def render_policy_summary_tab(df):
     # Only show min wage table if we have data
     if total_petitions > 0:
         st.subheader("Min Wage by Wage Level (with Example LCA)")
-        try:
-            min_lca = df.loc[df.groupby("PW_WAGE_LEVEL")['PREVAILING_WAGE'].idxmin()]
-            st.dataframe(min_lca[["PW_WAGE_LEVEL", "PREVAILING_WAGE", "CASE_NUMBER", "EMPLOYER_NAME", "JOB_TITLE", "EMPLOYER_CITY", "EMPLOYER_STATE"]], use_container_width=True)
-        except Exception as e:
-            st.warning(f"Could not display min wage table: {e}")
+        min_lca = get_min_wage_examples(company, year, state, city, soc_title, job_title)
+        if not min_lca.empty:
+            st.dataframe(min_lca[["PW_WAGE_LEVEL", "PREVAILING_WAGE"] + MIN_WAGE_EXAMPLE_COLUMNS], use_container_width=True)
     else:
         st.warning("No data available for min wage analysis.")
 
@@ -956,10 +1100,8 @@ st.sidebar.header("Filters")
 
 # Independent filters (not cascading)
 # Company filter with priority list for Indian journalists
-with st.spinner("Loading companies..."):
-    companies = get_all_companies()
-    years = get_all_years()
-    states = get_all_states()
+with st.spinner("Loading filter options..."):
+    companies, years, states, soc_titles = get_filter_options()
 
 # Priority companies for Indian journalists (high H-1B volumes, frequently in news)
 priority_companies = [
@@ -1017,9 +1159,7 @@ with st.spinner("Loading cities..."):
     cities = get_cities(state, company, year, None)
 city = st.sidebar.selectbox("🏙️ City", ["All"] + cities, help="Select a specific city or 'All' for all cities")
 
-# Independent SOC Title filter
-with st.spinner("Loading SOC titles..."):
-    soc_titles = get_all_soc_titles()
+# Independent SOC Title filter (options loaded with the other dimensions above)
 soc_title_default = 0
 try:
     if soc_titles:
@@ -1040,158 +1180,34 @@ job_title = st.sidebar.selectbox("👨‍💻 Job Title", ["All"] + job_titles,
 # Store the job_title value to ensure it's not affected by caching
 current_job_title = job_title
 
-# Main panel: filtered data
-with st.spinner("Loading data..."):
-    start_time = time.time()
-    df = get_filtered_data(company, year, state, city, soc_title)
-    if job_title and job_title != 'All':
-        df = df[df['NORMALIZED_JOB_TITLE'] == job_title]
-    load_time = time.time() - start_time
+# Start the summary and the default tab's rows for this filter state at once; the other
+# tabs submit their loads only when they are opened
+loads = submit_loads({
+    'summary': (load_summary_stats, (company, year, state, city, soc_title, current_job_title)),
+    'rows': (load_filtered_data, (company, year, state, city, soc_title, current_job_title)),
+}, interactive=('summary',))
 
-# Stats
+# Stats - from one aggregate row, rendered before any row-level data has arrived
 st.header("Summary Stats")
-st.metric("Total Lottery Petitions", f"{len(df):,}")
-
-# Initialize fig and config variables
-fig = None
-config = {}
+with st.spinner("Loading summary..."):
+    summary = await_load(loads['summary'], "summary stats")
+total_petitions = summary_count(summary)
+st.metric("Total Lottery Petitions", f"{total_petitions:,}")
 
 # Handle empty data gracefully
-if df.empty or len(df) == 0:
+if total_petitions == 0:
     st.warning("⚠️ No data found for the selected filters. Please try different filter combinations.")
     st.info("💡 Tip: Try selecting 'All' for some filters to see more data.")
 else:
-    try:
-        # Safe calculations with null checks
-        avg_wage = df['PREVAILING_WAGE'].mean() if not df['PREVAILING_WAGE'].isna().all() else 0
-        min_wage = df['PREVAILING_WAGE'].min() if not df['PREVAILING_WAGE'].isna().all() else 0
-        max_wage = df['PREVAILING_WAGE'].max() if not df['PREVAILING_WAGE'].isna().all() else 0
-        
-        st.metric("Avg Wage", f"${avg_wage:,.0f}")
-        st.metric("Min Wage", f"${min_wage:,.0f}")
-        st.metric("Max Wage", f"${max_wage:,.0f}")
-    except Exception as e:
-        st.error(f"Error calculating wage statistics: {e}")
-        st.metric("Avg Wage", "$0")
-        st.metric("Min Wage", "$0")
-        st.metric("Max Wage", "$0")
+    # AVG/MIN/MAX are NULL when none of the petitions has a wage
+    avg_wage, min_wage, max_wage = (
+        0 if pd.isna(summary[column].iloc[0]) else summary[column].iloc[0]
+        for column in ('avg_salary', 'min_salary', 'max_salary')
+    )
+    st.metric("Avg Wage", f"${avg_wage:,.0f}")
+    st.metric("Min Wage", f"${min_wage:,.0f}")
+    st.metric("Max Wage", f"${max_wage:,.0f}")
     
-    # Wage distribution graph - moved to tabs to prevent overlapping
-    import plotly.graph_objects as go
-    import numpy as np
-    
-    # Use all data - no sampling
-    df_plot = df.copy()
-    
-    # Safe data processing with error handling
-    try:
-        # Ensure required columns exist
-        if 'PW_WAGE_LEVEL' not in df_plot.columns or 'PREVAILING_WAGE' not in df_plot.columns:
-            st.error("Required columns 'PW_WAGE_LEVEL' or 'PREVAILING_WAGE' not found in data")
-            fig = None
-            config = {}
-        else:
-            # Remove rows with null values
-            df_plot = df_plot.dropna(subset=['PW_WAGE_LEVEL', 'PREVAILING_WAGE'])
-            
-            if df_plot.empty:
-                st.warning("No valid data available for visualization after removing null values")
-                fig = None
-                config = {}
-            else:
-                # Optimize data processing for large datasets
-                wage_levels = df_plot['PW_WAGE_LEVEL'].astype('category')
-                x_jitter = wage_levels.cat.codes + np.random.uniform(-0.2, 0.2, size=len(df_plot))
-                df_plot['x_jitter'] = x_jitter
-                
-                # Create visualization if we have valid data
-                if len(df_plot) > 0:
-                    # Use professional color scheme
-                    color_map = [COLORS['primary'], COLORS['secondary'], COLORS['success'], COLORS['warning'], 
-                                COLORS['info'], '#8c564b', '#e377c2', '#bcbd22']
-                    
-                    # Create color mapping
-                    color_discrete_map = {lvl: color_map[i % len(color_map)] for i, lvl in enumerate(wage_levels.cat.categories)}
-                    colors = [color_discrete_map.get(lvl, color_map[0]) for lvl in df_plot['PW_WAGE_LEVEL']]
-                    
-                    # Generate hover text
-                    if len(df_plot) > 10000:
-                        hover_texts = [f"${wage:,.0f}" for wage in df_plot['PREVAILING_WAGE']]
-                    else:
-                        hover_texts = []
-                        for _, row in df_plot.iterrows():
-                            try:
-                                wage = row.get('PREVAILING_WAGE', 0)
-                                job_title = row.get('NORMALIZED_JOB_TITLE', 'Unknown')
-                                hover_texts.append(f"Salary: ${wage:,.0f}<br>Job Title: {job_title}")
-                            except Exception:
-                                hover_texts.append("Data unavailable")
-                    
-                    # Create scatter trace
-                    marker_size = 4 if len(df_plot) > 10000 else 6
-                    marker_opacity = 0.4 if len(df_plot) > 10000 else 0.6
-                    
-                    scatter = go.Scatter(
-                        x=df_plot['x_jitter'],
-                        y=df_plot['PREVAILING_WAGE'],
-                        mode='markers',
-                        marker=dict(size=marker_size, opacity=marker_opacity, color=colors),
-                        text=hover_texts,
-                        hoverinfo='text',
-                        name='LCA Points',
-                        showlegend=False
-                    )
-                    
-                    # Create box traces
-                    box_traces = []
-                    for i, lvl in enumerate(wage_levels.cat.categories):
-                        y = df_plot[df_plot['PW_WAGE_LEVEL'] == lvl]['PREVAILING_WAGE']
-                        if len(y) > 0:
-                            box_traces.append(go.Box(
-                                y=y, x=[i]*len(y), name=str(lvl),
-                                marker_color=color_map[i % len(color_map)],
-                                boxpoints=False, opacity=0.3, showlegend=True
-                            ))
-                    
-                    # Create figure
-                    fig = go.Figure(data=box_traces + [scatter])
-                    
-                    # Layout
-                    layout_kwargs = {
-                        "title": "Wage Distribution by Wage Level (Each Point = Lottery LCA)",
-                        "xaxis": dict(
-                            tickvals=list(range(len(wage_levels.cat.categories))),
-                            ticktext=list(wage_levels.cat.categories),
-                            title="Wage Level"
-                        ),
-                        "yaxis": dict(title="Wage", tickformat=",.0f"),
-                        "legend_title_text": "Wage Level",
-                        "uirevision": True,
-                        "hovermode": 'closest'
-                    }
-                    
-
-                    
-                    fig.update_layout(**layout_kwargs)
-                    
-                    # Create config
-                    config = {
-                        'displayModeBar': True,
-                        'displaylogo': False,
-                        'modeBarButtonsToRemove': ['pan2d', 'lasso2d', 'select2d', 'autoScale2d'],
-                        'scrollZoom': True,
-                        'responsive': True,
-                        'staticPlot': False
-                    }
-                else:
-                    fig = None
-                    config = {}
-    except Exception as e:
-        st.error(f"Error processing data for visualization: {e}")
-        fig = None
-        config = {}
-    
-    # Visualization creation is now handled in the data processing section above
 
 # ============================================================================
 # H-1B PETITION LOTTERY EXPLORER
@@ -1200,65 +1216,77 @@ else:
 st.header("🎯 H-1B Petition Lottery Explorer")
 st.markdown("**Comprehensive analysis of H-1B petition data to understand policy impacts, wage distributions, and market trends**")
 
-# Use tabs to organize all policy analysis and prevent overlapping
-main_tab1, main_tab2, main_tab3, main_tab4, main_tab5 = st.tabs([
-    "📊 Wage Distribution", 
-    "💰 Top Occupations", 
-    "📈 Yearly Analysis", 
-    "🗺️ US Geographic Map",
-    "📋 Policy Summary"
-])
-
-# Background rendering implementation with immediate loading
-with main_tab1:
-    st.info("💡 **Wage Distribution Analysis**: Explore how salaries are distributed across different wage levels (I-IV) for this company. This helps understand the company's hiring patterns and salary competitiveness.")
+@st.fragment
+def render_explorer_tabs(loads, company, year, state, city, soc_title, job_title):
+    """Main analysis tabs as a fragment: switching tabs or using a tab's widgets reruns only this
+    part of the page, and only the open tab renders and loads its data (loads holds the summary
+    and row loads the page started)"""
+    # Use tabs to organize all policy analysis and prevent overlapping
+    main_tab1, main_tab2, main_tab3, main_tab4, main_tab5 = st.tabs([
+        "📊 Wage Distribution", 
+        "💰 Top Occupations", 
+        "📈 Yearly Analysis", 
+        "🗺️ US Geographic Map",
+        "📋 Policy Summary"
+    ], key='explorer_tab', on_change='rerun')
     
-    # Always load immediately for best UX
-    if df.empty or len(df) == 0:
-        st.warning("⚠️ No data available for wage distribution analysis.")
-        st.info("💡 Tip: Try selecting 'All' for some filters to see data.")
-    else:
-        render_wage_distribution_tab(df, fig, config)
-
-with main_tab2:
-    st.info("💡 **Top Occupations Analysis**: Discover the most common job titles and roles this company hires for H-1B positions. This shows the company's focus areas and career opportunities.")
+    with main_tab1:
+        if main_tab1.open:
+            st.info("💡 **Wage Distribution Analysis**: Explore how salaries are distributed across different wage levels (I-IV) for this company. This helps understand the company's hiring patterns and salary competitiveness.")
+            
+            with st.spinner("Loading data..."):
+                rows = await_load(loads['rows'], "filtered data")
+            if len(rows) == 0:
+                st.warning("⚠️ No data available for wage distribution analysis.")
+                st.info("💡 Tip: Try selecting 'All' for some filters to see data.")
+            else:
+                render_wage_distribution_tab(rows, company, year, state, city, soc_title, job_title)
     
-    # Always load immediately for best UX
-    if df.empty or len(df) == 0:
-        st.warning("⚠️ No data available for top occupations analysis.")
-        st.info("💡 Tip: Try selecting 'All' for some filters to see data.")
-    else:
-        render_top_occupations_tab(df)
-
-with main_tab3:
-    st.info("💡 **Yearly Analysis**: Track how this company's H-1B hiring patterns have changed over time (2020-2024). See trends in wage levels, salaries, and understand the impact of policy changes.")
+    with main_tab2:
+        if main_tab2.open:
+            st.info("💡 **Top Occupations Analysis**: Discover the most common job titles and roles this company hires for H-1B positions. This shows the company's focus areas and career opportunities.")
+            
+            if selection_is_empty(loads):
+                st.warning("⚠️ No data available for top occupations analysis.")
+                st.info("💡 Tip: Try selecting 'All' for some filters to see data.")
+            else:
+                render_top_occupations_tab(company, year, state, city, soc_title, job_title)
     
-    # Lazy load yearly analysis data for better performance
-    with st.spinner("Loading Yearly Analysis Data..."):
-        # Get data for yearly analysis (respects all filters EXCEPT year)
-        yearly_df = get_yearly_data(company, state, city, soc_title)
-        
-        # Handle empty yearly data
-        if yearly_df.empty or len(yearly_df) == 0:
-            st.warning("⚠️ No yearly data found for the selected filters.")
-            st.info("💡 Tip: Try selecting 'All' for some filters to see yearly trends.")
-        else:
-            render_yearly_analysis_tab(yearly_df, config)
-
-with main_tab4:
-    st.info("💡 **US Geographic Map**: Visualize where this company has H-1B positions across the United States. This helps understand the company's geographic presence and where opportunities are located.")
+    with main_tab3:
+        if main_tab3.open:
+            st.info("💡 **Yearly Analysis**: Track how this company's H-1B hiring patterns have changed over time (2020-2024). See trends in wage levels, salaries, and understand the impact of policy changes.")
+            
+            with st.spinner("Loading Yearly Analysis Data..."):
+                # Get data for yearly analysis (respects all filters EXCEPT year)
+                yearly_df = load_tab_data('yearly', load_yearly_data, (company, state, city, soc_title), "yearly data")
+                
+                # Handle empty yearly data
+                if yearly_df.empty or len(yearly_df) == 0:
+                    st.warning("⚠️ No yearly data found for the selected filters.")
+                    st.info("💡 Tip: Try selecting 'All' for some filters to see yearly trends.")
+                else:
+                    render_yearly_analysis_tab(yearly_df, CHART_CONFIG, {'employer': company, 'state': state, 'city': city, 'soc_title': soc_title})
     
-    # US Geographic Map - always load immediately for best UX
-    render_us_map_tab(company, year, soc_title, current_job_title)
-
-with main_tab5:
-    st.info("💡 **Policy Summary**: Understand how recent H-1B policy changes (like the wage-based selection rule) might impact this company's hiring patterns and what it means for job seekers.")
+    with main_tab4:
+        if main_tab4.open:
+            st.info("💡 **US Geographic Map**: Visualize where this company has H-1B positions across the United States. This helps understand the company's geographic presence and where opportunities are located.")
+            
+            # US Geographic Map
+            state_data = load_tab_data('states', load_company_state_data, (company, year, soc_title, job_title),
+                                       "company state data")
+            render_us_map_tab(company, year, soc_title, job_title, state_data)
     
-    # Always load immediately for best UX
-    if df.empty or len(df) == 0:
-        st.warning("⚠️ No data available for policy summary analysis.")
-        st.info("💡 Tip: Try selecting 'All' for some filters to see data.")
-    else:
-        render_policy_summary_tab(df)
+    with main_tab5:
+        if main_tab5.open:
+            st.info("💡 **Policy Summary**: Understand how recent H-1B policy changes (like the wage-based selection rule) might impact this company's hiring patterns and what it means for job seekers.")
+            
+            if selection_is_empty(loads):
+                st.warning("⚠️ No data available for policy summary analysis.")
+                st.info("💡 Tip: Try selecting 'All' for some filters to see data.")
+            else:
+                render_policy_summary_tab(await_load(loads['summary'], "summary stats"),
+                                          company, year, state, city, soc_title, job_title)
+
+render_explorer_tabs(loads, company, year, state, city, soc_title, current_job_title)
 
  
\ No newline at end of file
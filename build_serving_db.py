@@ -0,0 +1,163 @@
+"""Build the serving database the app reads from the raw LCA database.
+
+Usage:
+    python build_serving_db.py [--source job_market_std_employer.duckdb] [--output job_market_serving.duckdb]
+
+The serving database keeps only lottery H-1B petitions and the columns the app
+uses, stores wage level and state as ENUMs and wages as integers, is physically
+sorted by (employer, year, state) for zone-map pruning, and carries the
+pre-aggregated wage cube and the filter dimension and combination tables
+(see rollups.py and filter_index.py). It exposes the same
+job_market_data_aggressive_normalized name as a view, so every query in the app
+runs against it unchanged. The build is deterministic: re-running it on the same
+source produces the same file.
+"""
+import argparse
+import os
+import time
+
+import duckdb
+
+from rollups import (TABLE, CUBE_TABLE, DIMENSIONS_TABLE, COMBINATIONS_TABLE, LOTTERY_FILTER, ENUM_TYPES,
+                     build_dimensions_query, build_combinations_query)
+
+RAW_DB_FILE = 'job_market_std_employer.duckdb'
+SERVING_DB_FILE = 'job_market_serving.duckdb'
+SERVING_TABLE = 'lottery_petitions'
+
+# Columns the app reads - everything else stays in the raw database
+SERVING_COLUMNS = [
+    'YEAR',
+    'EMPLOYER_STATE',
+    'EMPLOYER_CITY',
+    'STD_EMPLOYER_NAME_PARENT',
+    'aggressive_normalized_soc_title',
+    'NORMALIZED_JOB_TITLE',
+    'JOB_TITLE',
+    'PW_WAGE_LEVEL',
+    'PREVAILING_WAGE',
+    'CASE_NUMBER',
+    'EMPLOYER_NAME'
+]
+
+# Physical sort order of the serving table. Most interactive queries filter on employer and
+# year, so clustering on them gives each row group a narrow min/max range and lets DuckDB's
+# zone maps skip every row group that cannot match (check with verify_pruning.py)
+CLUSTER_COLUMNS = ['STD_EMPLOYER_NAME_PARENT', 'YEAR', 'EMPLOYER_STATE']
+
+def build_wage_cube(con, source_table=TABLE):
+    """Materialize the additive YEAR x state x employer x SOC x wage level rollup"""
+    con.execute(f"""
+    CREATE OR REPLACE TABLE {CUBE_TABLE} AS
+    SELECT
+        YEAR,
+        EMPLOYER_STATE,
+        STD_EMPLOYER_NAME_PARENT,
+        aggressive_normalized_soc_title,
+        PW_WAGE_LEVEL,
+        COUNT(*) AS petition_count,
+        COUNT(PREVAILING_WAGE) AS wage_count,
+        SUM(PREVAILING_WAGE)::DOUBLE AS wage_sum,
+        SUM(PREVAILING_WAGE::DOUBLE * PREVAILING_WAGE::DOUBLE) AS wage_sum_sq,
+        MIN(PREVAILING_WAGE) AS wage_min,
+        MAX(PREVAILING_WAGE) AS wage_max,
+        COUNT(CASE WHEN PW_WAGE_LEVEL = 'I' THEN 1 END) AS level1_count,
+        COUNT(CASE WHEN PW_WAGE_LEVEL = 'II' THEN 1 END) AS level2_count,
+        COUNT(CASE WHEN PW_WAGE_LEVEL = 'III' THEN 1 END) AS level3_count,
+        COUNT(CASE WHEN PW_WAGE_LEVEL = 'IV' THEN 1 END) AS level4_count
+    FROM {source_table}
+    WHERE {LOTTERY_FILTER}
+    GROUP BY ALL
+    ORDER BY STD_EMPLOYER_NAME_PARENT, YEAR, EMPLOYER_STATE
+    """)
+    return con.execute(f"SELECT COUNT(*) FROM {CUBE_TABLE}").fetchone()[0]
+
+def build_dimension_table(con, source_table=TABLE):
+    """Materialize the distinct values and petition counts of every dropdown dimension"""
+    con.execute(f"CREATE OR REPLACE TABLE {DIMENSIONS_TABLE} AS {build_dimensions_query(source_table)}")
+    return con.execute(f"SELECT COUNT(*) FROM {DIMENSIONS_TABLE}").fetchone()[0]
+
+def build_combination_table(con, source_table=TABLE):
+    """Materialize the distinct filter value combinations the cascading dropdown index is built from"""
+    con.execute(f"""
+    CREATE OR REPLACE TABLE {COMBINATIONS_TABLE} AS
+    {build_combinations_query(source_table)}
+    ORDER BY ALL
+    """)
+    return con.execute(f"SELECT COUNT(*) FROM {COMBINATIONS_TABLE}").fetchone()[0]
+
+def build_serving_table(con, source_table):
+    """Copy lottery H-1B rows and the app's columns into a compactly typed, clustered table"""
+    # ENUM dictionaries are taken from the data so every stored value is representable
+    for column, type_name in ENUM_TYPES.items():
+        con.execute(f"""
+        CREATE TYPE {type_name} AS ENUM (
+            SELECT DISTINCT {column} FROM {source_table}
+            WHERE {LOTTERY_FILTER} AND {column} IS NOT NULL ORDER BY 1
+        )
+        """)
+
+    typed_columns = {column: f"{column}::{type_name} AS {column}" for column, type_name in ENUM_TYPES.items()}
+    typed_columns['PREVAILING_WAGE'] = "ROUND(PREVAILING_WAGE)::INTEGER AS PREVAILING_WAGE"
+    select = [typed_columns.get(column, column) for column in SERVING_COLUMNS]
+    con.execute(f"""
+    CREATE TABLE {SERVING_TABLE} AS
+    SELECT {', '.join(select)}
+    FROM {source_table}
+    WHERE {LOTTERY_FILTER}
+    ORDER BY {', '.join(CLUSTER_COLUMNS)}, CASE_NUMBER
+    """)
+
+    # Same name and filter columns as the raw table; the constant filter columns fold away in
+    # the optimizer. ENUM columns are exposed as stored - a cast here would turn every filter
+    # on them into a per-row expression that zone maps cannot prune with
+    con.execute(f"""
+    CREATE VIEW {TABLE} AS
+    SELECT {', '.join(SERVING_COLUMNS)}, 'H-1B' AS VISA_CLASS, TRUE AS is_lottery_petition
+    FROM {SERVING_TABLE}
+    """)
+    return con.execute(f"SELECT COUNT(*) FROM {SERVING_TABLE}").fetchone()[0]
+
+def build_serving_db(source, output):
+    """Build the serving database into a temporary file and move it into place"""
+    temp_output = output + '.tmp'
+    if os.path.exists(temp_output):
+        os.remove(temp_output)
+
+    con = duckdb.connect(temp_output)
+    try:
+        con.execute(f"ATTACH '{source}' AS raw (READ_ONLY)")
+        start_time = time.time()
+        rows = build_serving_table(con, f"raw.{TABLE}")
+        print(f"{SERVING_TABLE}: {rows:,} rows ({time.time() - start_time:.1f}s)")
+
+        start_time = time.time()
+        cube_rows = build_wage_cube(con)
+        print(f"{CUBE_TABLE}: {cube_rows:,} rows ({time.time() - start_time:.1f}s)")
+
+        start_time = time.time()
+        dimension_rows = build_dimension_table(con)
+        print(f"{DIMENSIONS_TABLE}: {dimension_rows:,} rows ({time.time() - start_time:.1f}s)")
+
+        start_time = time.time()
+        combination_rows = build_combination_table(con)
+        print(f"{COMBINATIONS_TABLE}: {combination_rows:,} rows ({time.time() - start_time:.1f}s)")
+
+        con.execute("DETACH raw")
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+
+    os.replace(temp_output, output)
+    print(f"Serving database: {output} ({os.path.getsize(output) / 1024**2:,.1f} MB, "
+          f"source {os.path.getsize(source) / 1024**2:,.1f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the serving database for the H-1B explorer")
+    parser.add_argument('--source', default=RAW_DB_FILE, help="DuckDB file holding the raw LCA table")
+    parser.add_argument('--output', default=SERVING_DB_FILE, help="Serving database to create")
+    args = parser.parse_args()
+    build_serving_db(args.source, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -1,49 +1,227 @@
 import duckdb
 import streamlit as st
+import os
 import threading
+import time
+from contextlib import contextmanager
 
-# Thread-local storage for database connections
+from query_scheduler import scheduler, PRIORITY_INTERACTIVE, PRIORITY_HEAVY, THREAD_BUDGET
+from query_cache import result_cache, make_cache_key, file_fingerprint, directory_fingerprint
+from rollups import TABLE, CUBE_TABLE, detect_enum_columns
+from export_parquet import PETITIONS_DIR, CUBE_DIR
+
+RAW_DB_FILE = 'job_market_std_employer.duckdb'
+SERVING_DB_FILE = 'job_market_serving.duckdb'   # Built by build_serving_db.py
+
+# Prefer the compact serving database when it has been built; H1B_DB_FILE overrides both
+DB_FILE = os.environ.get('H1B_DB_FILE') or (SERVING_DB_FILE if os.path.exists(SERVING_DB_FILE) else RAW_DB_FILE)
+
+# Directory written by export_parquet.py; when set the app queries the Parquet dataset instead of DB_FILE
+PARQUET_DIR = os.environ.get('H1B_PARQUET_DIR')
+
+# Process-wide database settings - every session shares one buffer pool and one memory budget
+DB_MEMORY_LIMIT = '2GB'
+
+# Cursor pool settings
+MAX_CURSORS = 32                 # Upper bound on cursors checked out at the same time
+LOADER_CURSORS = 8               # Held back for parallel_loader's threads, which script threads wait on
+CURSOR_CHECKOUT_TIMEOUT = 30     # Seconds to wait for a free cursor before giving up
+CURSOR_IDLE_TIMEOUT = 300        # Idle cursors unused for this many seconds are closed
+
+# Shared database instance and cursor pool (guarded by _pool_lock)
+_pool_lock = threading.Condition()
+_database = None
+_database_fingerprint = None
+_enum_columns = {}   # Columns stored as the serving database's ENUM types: column -> type name
+_idle_cursors = []   # [(cursor, returned_at)] - most recently returned last
+_checked_out = {}    # id(cursor) -> (owner thread, cursor)
+
+# Thread-local storage for the cursor checked out by the current script thread
 _local = threading.local()
 
+def _parquet_source(parquet_dir, name):
+    """read_parquet() over one Hive-partitioned dataset of the export; YEAR keeps its integer type"""
+    path = os.path.join(parquet_dir, name, '**', '*.parquet')
+    return f"read_parquet('{path}', hive_partitioning=true, hive_types={{'YEAR': 'INTEGER'}}, hive_types_autocast=false)"
+
+def _create_parquet_views(database, parquet_dir):
+    """Expose the exported Parquet dataset under the same names as the database tables"""
+    database.execute(f"""
+    CREATE VIEW {TABLE} AS
+    SELECT *, 'H-1B' AS VISA_CLASS, TRUE AS is_lottery_petition
+    FROM {_parquet_source(parquet_dir, PETITIONS_DIR)}
+    """)
+    if os.path.isdir(os.path.join(parquet_dir, CUBE_DIR)):
+        database.execute(f"CREATE VIEW {CUBE_TABLE} AS SELECT * FROM {_parquet_source(parquet_dir, CUBE_DIR)}")
+
+def _open_database():
+    """Open the database file (or the Parquet dataset) once for the whole process"""
+    global _database, _database_fingerprint, _enum_columns
+    if _database is None:
+        config = {
+            'memory_limit': DB_MEMORY_LIMIT,
+            'threads': THREAD_BUDGET,
+            'max_memory': DB_MEMORY_LIMIT
+        }
+        if PARQUET_DIR:
+            # In-memory catalog holding only views; the data stays in the Parquet files
+            _database_fingerprint = directory_fingerprint(PARQUET_DIR)
+            _database = duckdb.connect(':memory:', config=config)
+            _create_parquet_views(_database, PARQUET_DIR)
+        else:
+            _database_fingerprint = file_fingerprint(DB_FILE)
+            _database = duckdb.connect(DB_FILE, read_only=True, config=config)
+        _database.execute("SET temp_directory=''")  # Use memory for temp files
+        _enum_columns = detect_enum_columns(_database)
+    return _database
+
+def _reap_cursors():
+    """Reclaim cursors of finished threads and close cursors idle for too long (caller holds _pool_lock)"""
+    for key, (owner, cursor) in list(_checked_out.items()):
+        if not owner.is_alive():
+            del _checked_out[key]
+            _idle_cursors.append((cursor, time.monotonic()))
+
+    now = time.monotonic()
+    while _idle_cursors and now - _idle_cursors[0][1] > CURSOR_IDLE_TIMEOUT:
+        cursor, _ = _idle_cursors.pop(0)
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+def checkout_cursor(timeout=CURSOR_CHECKOUT_TIMEOUT, reserved=False):
+    """Check out a cursor on the shared database, waiting for a free slot if the pool is exhausted.
+
+    Only loader threads (reserved=True) may take the last LOADER_CURSORS: script threads
+    hold their cursor while they wait on loads, so without the reserve a burst of
+    sessions could take every cursor and leave their own loads nothing to run on.
+    """
+    limit = MAX_CURSORS if reserved else MAX_CURSORS - LOADER_CURSORS
+    deadline = time.monotonic() + timeout
+    with _pool_lock:
+        database = _open_database()
+        _reap_cursors()
+        while len(_checked_out) >= limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"No database cursor available after {timeout}s ({limit} in use)")
+            _pool_lock.wait(min(remaining, 1.0))
+            _reap_cursors()
+
+        if _idle_cursors:
+            cursor, _ = _idle_cursors.pop()
+        else:
+            cursor = database.cursor()
+        _checked_out[id(cursor)] = (threading.current_thread(), cursor)
+        return cursor
+
+def return_cursor(cursor, discard=False):
+    """Return a checked-out cursor to the pool (or close it when discard=True)"""
+    with _pool_lock:
+        if _checked_out.pop(id(cursor), None) is None:
+            return
+        if discard:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        else:
+            _idle_cursors.append((cursor, time.monotonic()))
+        _pool_lock.notify()
+
+@contextmanager
+def db_cursor(reserved=False):
+    """Check out a cursor for the duration of a with-block (for worker threads and one-off queries);
+    reserved=True may use the cursors held back for loader threads"""
+    cursor = checkout_cursor(reserved=reserved)
+    try:
+        yield cursor
+    finally:
+        return_cursor(cursor)
+
+def _fetch(con, result):
+    """Fetch the pending result of con as a DataFrame or an Arrow table"""
+    if result == 'arrow':
+        # Arrow keeps dictionary-encoded (ENUM) columns encoded and avoids per-value Python objects
+        return con.to_arrow_table()
+    return con.fetchdf()
+
+def run_query(con, query, params=None, priority=PRIORITY_HEAVY, use_cache=True, result='pandas', answer=None):
+    """Execute a query through the result cache and global scheduler.
+
+    result selects the result type: 'pandas' (DataFrame) or 'arrow' (pyarrow.Table).
+    answer, when given, is called on a cache miss to produce the same result without
+    executing query (e.g. from cached rows); the query only runs when it returns None.
+    """
+    key = make_cache_key(query, params, _database_fingerprint, result)
+    if use_cache:
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+
+    data = answer() if answer is not None else None
+    if data is None:
+        with scheduler.slot(priority):
+            con.execute(query, params or [])
+            data = _fetch(con, result)
+
+    if use_cache:
+        result_cache.put(key, data)
+    return data
+
+def get_database_fingerprint():
+    """Version of the open database (file or Parquet dataset) used to key process-wide caches"""
+    return _database_fingerprint
+
+def get_enum_columns():
+    """Columns of the open database stored as ENUMs: column -> type name"""
+    with _pool_lock:
+        _open_database()
+        return _enum_columns
+
+def get_cache_stats():
+    """Hit/miss/eviction counters of the cross-session result cache"""
+    return result_cache.stats()
+
+def get_pool_stats():
+    """Snapshot of the cursor pool for monitoring"""
+    with _pool_lock:
+        return {
+            'database_open': _database is not None,
+            'checked_out': len(_checked_out),
+            'idle': len(_idle_cursors),
+            'max_cursors': MAX_CURSORS,
+            'loader_cursors': LOADER_CURSORS
+        }
+
 def get_db_connection():
-    """Get a database connection for the current thread/page with optimized settings"""
-    if not hasattr(_local, 'db_connection') or _local.db_connection is None:
+    """Get the cursor for the current thread/page, checked out from the shared database"""
+    if getattr(_local, 'db_connection', None) is None:
         try:
-            # Optimize DuckDB connection for memory and performance
-            _local.db_connection = duckdb.connect(
-                'job_market_std_employer.duckdb', 
-                read_only=True,
-                config={
-                    'memory_limit': '1GB',
-                    'threads': 1,
-                    'max_memory': '1GB'
-                }
-            )
-            
-            # Set connection optimizations
-            _local.db_connection.execute("SET memory_limit='1GB'")
-            _local.db_connection.execute("SET threads=1")
-            _local.db_connection.execute("SET temp_directory=''")  # Use memory for temp files
-            
+            _local.db_connection = checkout_cursor()
         except Exception as e:
             st.error(f"Error connecting to database: {e}")
             # Force garbage collection on error
             import gc
             gc.collect()
             return None
-    
+
     return _local.db_connection
 
 def close_db_connection():
-    """Close the database connection for the current thread"""
-    if hasattr(_local, 'db_connection') and _local.db_connection is not None:
+    """Return the current thread's cursor to the pool"""
+    if getattr(_local, 'db_connection', None) is not None:
         try:
-            _local.db_connection.close()
-            _local.db_connection = None
+            return_cursor(_local.db_connection)
         except Exception as e:
             st.error(f"Error closing database connection: {e}")
+        finally:
+            _local.db_connection = None
 
 def reset_db_connection():
     """Reset the database connection (useful for troubleshooting)"""
-    close_db_connection()
-    return get_db_connection() 
\ No newline at end of file
+    if getattr(_local, 'db_connection', None) is not None:
+        return_cursor(_local.db_connection, discard=True)
+        _local.db_connection = None
+    return get_db_connection()
@@ -0,0 +1,31 @@
+"""Dropdown options for every page, loaded from the filter_dimensions table in one round trip.
+
+build_serving_db.py persists the table; against a database without it (the raw file or
+a Parquet export) the same GROUPING SETS query runs live, still as a single scan, and
+the cross-session result cache keeps its result for every later page load.
+"""
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from database_connection import run_query, PRIORITY_INTERACTIVE
+from rollups import DIMENSIONS_TABLE, FILTER_DIMENSIONS, build_dimensions_query, has_rollup_table
+
+def load_dimensions(con):
+    """Return {dimension name: sorted list of values} for all filter dimensions"""
+    if has_rollup_table(con, DIMENSIONS_TABLE):
+        query = f"SELECT * FROM {DIMENSIONS_TABLE}"
+    else:
+        query = build_dimensions_query()
+    # Arrow result: dropdown lists are built without an intermediate DataFrame
+    table = run_query(con, query, priority=PRIORITY_INTERACTIVE, result='arrow')
+
+    dimensions = {}
+    for name, column in FILTER_DIMENSIONS.items():
+        values = table.filter(pc.equal(table['dimension'], name))[column].drop_null()
+        if pa.types.is_dictionary(values.type):
+            # ENUM columns of the serving database arrive dictionary-encoded
+            values = values.cast(values.type.value_type)
+        if name != 'year':
+            values = values.filter(pc.not_equal(values, ''))
+        dimensions[name] = values.take(pc.array_sort_indices(values)).to_pylist()
+    return dimensions
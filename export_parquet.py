@@ -0,0 +1,80 @@
+"""Export the lottery petitions and the wage cube as a Hive-partitioned Parquet dataset.
+
+Usage:
+    python export_parquet.py [--source job_market_std_employer.duckdb] [--output job_market_parquet]
+                             [--partition-by-state] [--year 2025 ...]
+
+Layout:
+    <output>/petitions/YEAR=2024/[EMPLOYER_STATE=CA/]data_0.parquet
+    <output>/wage_cube/YEAR=2024/data_0.parquet
+
+Point the app at the directory with H1B_PARQUET_DIR=<output> (see database_connection.py).
+Queries filtered on YEAR (and EMPLOYER_STATE when partitioned by it) only open the
+matching files. A new fiscal year is added with --year, which writes just that
+year's partitions and leaves the existing files untouched.
+"""
+import argparse
+import os
+import time
+
+import duckdb
+
+from rollups import TABLE, CUBE_TABLE, LOTTERY_FILTER
+from build_serving_db import RAW_DB_FILE, SERVING_COLUMNS, build_wage_cube
+
+PARQUET_DIR = 'job_market_parquet'
+PETITIONS_DIR = 'petitions'
+CUBE_DIR = 'wage_cube'
+
+def export_parquet(source, output, partition_by_state=False, years=None):
+    """Write the petitions and wage cube partitions for the given years (all years when None)"""
+    partitions = 'YEAR, EMPLOYER_STATE' if partition_by_state else 'YEAR'
+    # Only the exported years' directories are (re)written when years are given
+    write_mode = 'OVERWRITE_OR_IGNORE' if years else 'OVERWRITE'
+    year_filter = f" AND YEAR IN ({', '.join(str(int(year)) for year in years)})" if years else ""
+
+    os.makedirs(output, exist_ok=True)
+    con = duckdb.connect()
+    try:
+        con.execute(f"ATTACH '{source}' AS source (READ_ONLY)")
+        con.execute(f"""
+        CREATE TEMP VIEW export_petitions AS
+        SELECT * FROM source.{TABLE}
+        WHERE {LOTTERY_FILTER}{year_filter}
+        """)
+
+        start_time = time.time()
+        petitions_path = os.path.join(output, PETITIONS_DIR)
+        con.execute(f"""
+        COPY (
+            SELECT {', '.join(SERVING_COLUMNS)} FROM export_petitions
+            ORDER BY STD_EMPLOYER_NAME_PARENT, YEAR, EMPLOYER_STATE, CASE_NUMBER
+        ) TO '{petitions_path}' (FORMAT PARQUET, PARTITION_BY ({partitions}), {write_mode})
+        """)
+        rows = con.execute("SELECT COUNT(*) FROM export_petitions").fetchone()[0]
+        print(f"{petitions_path}: {rows:,} rows partitioned by {partitions} ({time.time() - start_time:.1f}s)")
+
+        # The cube is additive per year, so it can be partitioned (and appended to) the same way
+        start_time = time.time()
+        cube_path = os.path.join(output, CUBE_DIR)
+        cube_rows = build_wage_cube(con, 'export_petitions')
+        con.execute(f"""
+        COPY {CUBE_TABLE} TO '{cube_path}' (FORMAT PARQUET, PARTITION_BY (YEAR), {write_mode})
+        """)
+        print(f"{cube_path}: {cube_rows:,} rows partitioned by YEAR ({time.time() - start_time:.1f}s)")
+    finally:
+        con.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the H-1B explorer data as Hive-partitioned Parquet")
+    parser.add_argument('--source', default=RAW_DB_FILE, help="DuckDB file holding the petitions table")
+    parser.add_argument('--output', default=PARQUET_DIR, help="Directory to write the dataset to")
+    parser.add_argument('--partition-by-state', action='store_true',
+                        help="Partition petitions by EMPLOYER_STATE within each year")
+    parser.add_argument('--year', type=int, action='append', dest='years',
+                        help="Only (re)write these fiscal years; repeat for several")
+    args = parser.parse_args()
+    export_parquet(args.source, args.output, args.partition_by_state, args.years)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Cross-session cache of built Plotly figures, stored as their JSON serialization.
+
+Figures are keyed by (view id, normalized filter tuple, database fingerprint): the same
+view under the same sidebar selection of the same data is always the same figure, so
+switching back to a previously viewed selection skips the figure construction (and the
+queries that only feed the figure). Entries live in their own byte-capped LRU.
+"""
+import plotly.io as pio
+
+from database_connection import get_database_fingerprint
+from query_cache import ResultCache
+
+FIGURE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+FIGURE_CACHE_MAX_ENTRY_BYTES = FIGURE_CACHE_MAX_BYTES // 4
+
+def _normalize(value):
+    """Hashable, order-independent form of a filter value"""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(str(item) for item in value))
+    return str(value)
+
+def figure_key(view, filters):
+    """Cache key: view id + set filters (None, '' and 'All' mean unfiltered) + database fingerprint"""
+    normalized = tuple(sorted(
+        (name, _normalize(value)) for name, value in filters.items()
+        if value is not None and value != '' and value != 'All'
+    ))
+    return (view, normalized, get_database_fingerprint())
+
+def get_cached_figure(view, filters):
+    """Return the cached figure for a view and filter state, or None on a miss"""
+    payload = figure_cache.get(figure_key(view, filters))
+    if payload is None:
+        return None
+    return pio.from_json(payload)
+
+def cache_figure(view, filters, fig):
+    """Store a built figure; returns it unchanged"""
+    if fig is not None:
+        figure_cache.put(figure_key(view, filters), fig.to_json())
+    return fig
+
+# Process-wide figure cache shared by all sessions
+figure_cache = ResultCache(max_bytes=FIGURE_CACHE_MAX_BYTES, max_entry_bytes=FIGURE_CACHE_MAX_ENTRY_BYTES)
@@ -0,0 +1,129 @@
+"""In-memory co-occurrence index answering the cascading sidebar dropdowns.
+
+The index holds every distinct combination of the filter dimensions (employer, state,
+city, SOC title, job title, year) as integer codes, plus a posting list per dimension
+value: the sorted row numbers of the combinations containing it. The valid values of
+one dimension under any filters on the others are found by intersecting the filters'
+posting lists and reading the target codes of the surviving rows, so changing the
+company or state repopulates dependent dropdowns without touching the database.
+
+The index is built once per process (and again if the database file changes) from
+the filter_combinations table, or from a live SELECT DISTINCT when it is absent.
+"""
+import threading
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from database_connection import run_query, get_database_fingerprint, PRIORITY_INTERACTIVE
+from rollups import COMBINATIONS_TABLE, FILTER_DIMENSIONS, build_combinations_query, has_rollup_table
+
+def _encode(column):
+    """Dictionary-encode an Arrow column: (int32 code per row, -1 for NULL; sorted distinct values)"""
+    column = column.combine_chunks()
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+    dictionary = column.dictionary
+    # Re-number the dictionary in sorted order so codes sort like their values
+    order = pc.array_sort_indices(dictionary).to_numpy()
+    rank = np.empty(len(dictionary), dtype=np.int32)
+    rank[order] = np.arange(len(dictionary), dtype=np.int32)
+    indices = pc.fill_null(column.indices.cast(pa.int32()), -1).to_numpy()
+    codes = np.where(indices >= 0, rank[indices], -1).astype(np.int32)
+    return codes, dictionary.take(pa.array(order)).to_pylist()
+
+class CooccurrenceIndex:
+    """Dictionary-encoded filter combinations with per-value posting lists"""
+
+    def __init__(self, table):
+        self.size = table.num_rows
+        self.codes = {}       # dimension -> int32 code per combination (-1 for NULL)
+        self.values = {}      # dimension -> sorted distinct values (code -> value)
+        self.lookup = {}      # dimension -> {value: code}
+        self.postings = {}    # dimension -> [sorted row numbers per code]
+        for name, column in FILTER_DIMENSIONS.items():
+            codes, values = _encode(table[column])
+            self.codes[name] = codes
+            self.values[name] = values
+            self.lookup[name] = {value: code for code, value in enumerate(self.values[name])}
+
+            # Rows grouped by code: a stable sort keeps each posting list in row order
+            order = np.argsort(codes, kind='stable').astype(np.int32)
+            boundaries = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            self.postings[name] = [order[boundaries[i]:boundaries[i + 1]] for i in range(len(values))]
+
+    def _code(self, name, value):
+        """Code of a filter value, or None when the value never occurs"""
+        if name == 'year':
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                return None
+        return self.lookup[name].get(value)
+
+    def matching_rows(self, filters):
+        """Row numbers of the combinations that satisfy every filter.
+
+        filters maps a dimension name to a single value or to a list/set of allowed
+        values; None and 'All' mean unfiltered. Returns None when nothing is filtered.
+        """
+        postings = []
+        allowed = []
+        for name, value in filters.items():
+            if value is None or value == 'All' or value == '':
+                continue
+            if isinstance(value, (list, tuple, set)):
+                codes = [self._code(name, v) for v in value]
+                allowed.append((name, np.array([c for c in codes if c is not None], dtype=np.int32)))
+                continue
+            code = self._code(name, value)
+            if code is None:
+                return np.empty(0, dtype=np.int32)
+            postings.append(self.postings[name][code])
+
+        rows = None
+        # Intersect the shortest lists first so each step works on the fewest rows
+        for posting in sorted(postings, key=len):
+            rows = posting if rows is None else np.intersect1d(rows, posting, assume_unique=True)
+            if len(rows) == 0:
+                return rows
+        for name, codes in allowed:
+            candidates = self.codes[name] if rows is None else self.codes[name][rows]
+            mask = np.isin(candidates, codes)
+            rows = np.flatnonzero(mask).astype(np.int32) if rows is None else rows[mask]
+        return rows
+
+    def distinct_values(self, target, filters):
+        """Sorted distinct non-NULL values of target among the combinations matching filters"""
+        rows = self.matching_rows(filters)
+        codes = self.codes[target] if rows is None else self.codes[target][rows]
+        codes = np.unique(codes)
+        values = self.values[target]
+        return [values[code] for code in codes if code >= 0]
+
+    def memory_bytes(self):
+        """Approximate memory held by the code arrays and posting lists"""
+        return sum(codes.nbytes for codes in self.codes.values()) + \
+            sum(posting.nbytes for postings in self.postings.values() for posting in postings)
+
+# Process-wide index shared by all sessions, rebuilt when the database fingerprint changes
+_index = None
+_index_fingerprint = None
+_index_lock = threading.Lock()
+
+def get_filter_index(con):
+    """Return the co-occurrence index for the open database, building it on first use"""
+    global _index, _index_fingerprint
+    with _index_lock:
+        fingerprint = get_database_fingerprint()
+        if _index is None or _index_fingerprint != fingerprint:
+            if has_rollup_table(con, COMBINATIONS_TABLE):
+                query = f"SELECT * FROM {COMBINATIONS_TABLE}"
+            else:
+                query = build_combinations_query()
+            # Not kept in the result cache: the index is the cached form
+            table = run_query(con, query, priority=PRIORITY_INTERACTIVE, use_cache=False, result='arrow')
+            _index = CooccurrenceIndex(table)
+            _index_fingerprint = fingerprint
+        return _index
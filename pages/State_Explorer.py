@@ -11,7 +11,15 @@ st.set_page_config(page_title="H-1B State-Level Explorer", layout="wide")
 DB_FILE = 'job_market_std_employer.duckdb'
 TABLE = 'job_market_data_aggressive_normalized'
 
+# Measures of the wage level and job category breakdowns
+BREAKDOWN_AGGREGATES = ['petition_count', 'wage_count', 'avg_salary', 'min_salary', 'max_salary']
+
 from database_connection import get_db_connection
+from query_builder import aggregate
+from database_connection import PRIORITY_INTERACTIVE
+from dimensions import load_dimensions
+from filter_index import get_filter_index
+from figure_cache import get_cached_figure, cache_figure
 
 def get_state_filter_options():
     """Get filter options for state-level analysis"""
@@ -20,10 +28,11 @@ def get_state_filter_options():
         if con is None:
             return [], [], []
         
-        # Load only necessary data
-        states = con.execute(f"SELECT DISTINCT EMPLOYER_STATE FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND EMPLOYER_STATE IS NOT NULL ORDER BY EMPLOYER_STATE").fetchdf()['EMPLOYER_STATE'].tolist()
-        years = con.execute(f"SELECT DISTINCT YEAR FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE ORDER BY YEAR").fetchdf()['YEAR'].tolist()
-        soc_titles = con.execute(f"SELECT DISTINCT aggressive_normalized_soc_title FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND aggressive_normalized_soc_title IS NOT NULL AND aggressive_normalized_soc_title NOT LIKE '%Other%' ORDER BY aggressive_normalized_soc_title").fetchdf()['aggressive_normalized_soc_title'].tolist()
+        # All dropdowns come from one dimension query
+        dimensions = load_dimensions(con)
+        states = dimensions['state']
+        years = dimensions['year']
+        soc_titles = [title for title in dimensions['soc_title'] if 'Other' not in title]
         
         gc.collect()
         return states, years, soc_titles
@@ -31,32 +40,48 @@ def get_state_filter_options():
         st.error(f"Failed to load filter options: {e}")
         return [], [], []
 
-def get_state_filtered_data(state, year, soc_title):
-    """Get filtered data for state-level analysis"""
-    with st.spinner("Loading state data..."):
+def state_filter_spec(state, year, soc_title, job_title=None):
+    """Filter spec for the state view"""
+    return {
+        'state': state, 'year': year, 'soc_title': soc_title, 'job_title': job_title,
+        # Filter out any job categories containing "Other" like in trends analysis
+        'exclude_other_soc': True
+    }
+
+def get_state_summary_stats(state, year, soc_title, job_title=None):
+    """Petition count and wage mean/min/max for the state view as one aggregate row"""
+    try:
+        con = get_db_connection()
+        return aggregate(con, [], ['petition_count', 'avg_salary', 'min_salary', 'max_salary'],
+                         state_filter_spec(state, year, soc_title, job_title),
+                         view='state_summary_stats', priority=PRIORITY_INTERACTIVE)
+    except Exception as e:
+        st.error(f"Failed to load summary stats: {e}")
+        return pd.DataFrame()
+
+def get_state_wage_levels(state, year, soc_title, job_title=None):
+    """Petitions and wage statistics per wage level for the state view in one grouped query"""
+    with st.spinner("Loading wage levels..."):
         try:
             con = get_db_connection()
-            query = f"SELECT * FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE"
-            params = []
-            
-            if state and state != 'All':
-                query += " AND EMPLOYER_STATE = ?"
-                params.append(state)
-            if year:
-                query += " AND YEAR = ?"
-                params.append(year)
-            if soc_title and soc_title != 'All':
-                query += " AND aggressive_normalized_soc_title = ?"
-                params.append(soc_title)
-            
-            # Filter out any job categories containing "Other" like in trends analysis
-            query += " AND aggressive_normalized_soc_title NOT LIKE '%Other%'"
-            
-            df = con.execute(query, params).fetchdf()
-            gc.collect()
-            return df
+            filters = dict(state_filter_spec(state, year, soc_title, job_title), not_null=['PW_WAGE_LEVEL'])
+            return aggregate(con, [('PW_WAGE_LEVEL', 'PW_WAGE_LEVEL')], BREAKDOWN_AGGREGATES, filters,
+                             order_by='PW_WAGE_LEVEL', view='state_wage_levels')
+        except Exception as e:
+            st.error(f"Failed to load wage levels: {e}")
+            return pd.DataFrame()
+
+def get_state_top_categories(state, year, soc_title, job_title=None, limit=10):
+    """Job categories with the most petitions and their wage statistics in one grouped query"""
+    with st.spinner("Loading job categories..."):
+        try:
+            con = get_db_connection()
+            return aggregate(con, [('aggressive_normalized_soc_title', 'aggressive_normalized_soc_title')],
+                             BREAKDOWN_AGGREGATES, state_filter_spec(state, year, soc_title, job_title),
+                             order_by='petition_count DESC, aggressive_normalized_soc_title',
+                             view='state_top_categories', limit=limit)
         except Exception as e:
-            st.error(f"Failed to load state data: {e}")
+            st.error(f"Failed to load job categories: {e}")
             return pd.DataFrame()
 
 def get_job_titles(state, soc_title, year):
@@ -64,25 +89,11 @@ def get_job_titles(state, soc_title, year):
     with st.spinner("Loading job titles..."):
         try:
             con = get_db_connection()
-            query = f"SELECT DISTINCT NORMALIZED_JOB_TITLE FROM {TABLE} WHERE VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE AND NORMALIZED_JOB_TITLE IS NOT NULL"
-            params = []
-            
-            if state and state != 'All':
-                query += " AND EMPLOYER_STATE = ?"
-                params.append(state)
-            if soc_title and soc_title != 'All':
-                query += " AND aggressive_normalized_soc_title = ?"
-                params.append(soc_title)
-            if year:
-                query += " AND YEAR = ?"
-                params.append(year)
-            
+            index = get_filter_index(con)
             # Filter out any job categories containing "Other" like in trends analysis
-            query += " AND aggressive_normalized_soc_title NOT LIKE '%Other%'"
-            query += " ORDER BY NORMALIZED_JOB_TITLE"
-            job_titles = con.execute(query, params).fetchdf()['NORMALIZED_JOB_TITLE'].tolist()
-            gc.collect()
-            return job_titles
+            if not soc_title or soc_title == 'All':
+                soc_title = [title for title in index.values['soc_title'] if 'Other' not in title]
+            return index.distinct_values('job_title', {'state': state, 'soc_title': soc_title, 'year': year})
         except Exception as e:
             st.error(f"Failed to load job titles: {e}")
             return []
@@ -147,19 +158,22 @@ with st.spinner("Loading job titles..."):
     job_titles = get_job_titles(state, soc_title, year)
 job_title = st.sidebar.selectbox("👨‍💻 Job Title", ["All"] + job_titles, help="Select a specific job title or 'All' for all titles")
 
-# Get filtered data
-with st.spinner("Loading state data..."):
-    df = get_state_filtered_data(state, year, soc_title)
-    if job_title and job_title != 'All':
-        df = df[df['NORMALIZED_JOB_TITLE'] == job_title]
+# Charts are determined by the sidebar selection - it keys the figure cache
+chart_filters = {'state': state, 'year': year, 'soc_title': soc_title, 'job_title': job_title}
 
-# Stats
+# Stats - from one aggregate row, rendered before the row-level data is fetched
 st.header("Summary Stats")
-if not df.empty:
-    total_petitions = len(df)
-    avg_salary = df['PREVAILING_WAGE'].mean()
-    min_salary = df['PREVAILING_WAGE'].min()
-    max_salary = df['PREVAILING_WAGE'].max()
+with st.spinner("Loading summary..."):
+    summary = get_state_summary_stats(state, year, soc_title, job_title)
+# 0 when there is no row or the count is NULL/NA
+total_petitions = summary['petition_count'].iloc[0] if not summary.empty else 0
+total_petitions = 0 if pd.isna(total_petitions) else int(total_petitions)
+if total_petitions > 0:
+    # AVG/MIN/MAX are NULL when none of the petitions has a wage
+    avg_salary, min_salary, max_salary = (
+        0 if pd.isna(summary[column].iloc[0]) else summary[column].iloc[0]
+        for column in ('avg_salary', 'min_salary', 'max_salary')
+    )
     
     st.metric("Total Lottery Petitions", f"{total_petitions:,.0f}")
     st.metric("Avg Wage", f"${avg_salary:,.0f}")
@@ -172,7 +186,7 @@ else:
     st.metric("Max Wage", "$0")
 
 # Handle empty data gracefully
-if df.empty or len(df) == 0:
+if total_petitions == 0:
     st.warning("⚠️ No data found for the selected filters. Please try different filter combinations.")
     st.info("💡 Tip: Try selecting 'All' for some filters to see more data.")
 else:
@@ -186,19 +200,24 @@ else:
         st.markdown("**📊 Wage Distribution by Level**")
         st.markdown("💰 **What this shows**: How salaries are distributed across different wage levels in this state.")
         
-        # Simple wage level breakdown
-        wage_level_counts = df['PW_WAGE_LEVEL'].value_counts().reset_index()
+        # Simple wage level breakdown - one row per level, most petitions first for the chart
+        wage_levels = get_state_wage_levels(state, year, soc_title, job_title)
+        wage_level_counts = wage_levels.sort_values('petition_count', ascending=False, kind='stable')
+        wage_level_counts = wage_level_counts[['PW_WAGE_LEVEL', 'petition_count']].reset_index(drop=True)
         wage_level_counts.columns = ['Wage Level', 'Petitions']
         
-        fig_wage = px.bar(wage_level_counts, x='Wage Level', y='Petitions',
-                         title="Petitions by Wage Level",
-                         color='Petitions', color_continuous_scale='viridis')
-        fig_wage.update_layout(height=400)
+        fig_wage = get_cached_figure('state_wage_levels', chart_filters)
+        if fig_wage is None:
+            fig_wage = px.bar(wage_level_counts, x='Wage Level', y='Petitions',
+                             title="Petitions by Wage Level",
+                             color='Petitions', color_continuous_scale='viridis')
+            fig_wage.update_layout(height=400)
+            cache_figure('state_wage_levels', chart_filters, fig_wage)
         st.plotly_chart(fig_wage, use_container_width=True)
         
         # Wage level summary
         st.markdown("**📋 Wage Level Summary**")
-        wage_summary = df.groupby('PW_WAGE_LEVEL')['PREVAILING_WAGE'].agg(['count', 'mean', 'min', 'max']).reset_index()
+        wage_summary = wage_levels[['PW_WAGE_LEVEL', 'wage_count', 'avg_salary', 'min_salary', 'max_salary']].copy()
         wage_summary.columns = ['Level', 'Petitions', 'Avg Salary', 'Min Salary', 'Max Salary']
         wage_summary['Avg Salary'] = wage_summary['Avg Salary'].round(0).astype(int)
         wage_summary['Min Salary'] = wage_summary['Min Salary'].round(0).astype(int)
@@ -210,22 +229,23 @@ else:
         st.markdown("💼 **What this shows**: Most common job categories in this state.")
         
         # Top job categories
-        top_jobs = df['aggressive_normalized_soc_title'].value_counts().head(10).reset_index()
+        top_categories = get_state_top_categories(state, year, soc_title, job_title)
+        top_jobs = top_categories[['aggressive_normalized_soc_title', 'petition_count']].copy()
         top_jobs.columns = ['Job Category', 'Petitions']
         
-        fig_jobs = px.bar(top_jobs, x='Petitions', y='Job Category', orientation='h',
-                         title="Top 10 Job Categories",
-                         color='Petitions', color_continuous_scale='plasma')
-        fig_jobs.update_layout(height=400)
+        fig_jobs = get_cached_figure('state_top_categories', chart_filters)
+        if fig_jobs is None:
+            fig_jobs = px.bar(top_jobs, x='Petitions', y='Job Category', orientation='h',
+                             title="Top 10 Job Categories",
+                             color='Petitions', color_continuous_scale='plasma')
+            fig_jobs.update_layout(height=400)
+            cache_figure('state_top_categories', chart_filters, fig_jobs)
         st.plotly_chart(fig_jobs, use_container_width=True)
         
         # Job categories summary
         st.markdown("**📋 Top Job Categories Summary**")
-        job_summary = df.groupby('aggressive_normalized_soc_title').agg({
-            'PREVAILING_WAGE': ['count', 'mean', 'min', 'max']
-        }).reset_index()
+        job_summary = top_categories[['aggressive_normalized_soc_title', 'wage_count', 'avg_salary', 'min_salary', 'max_salary']].copy()
         job_summary.columns = ['Job Category', 'Petitions', 'Avg Salary', 'Min Salary', 'Max Salary']
-        job_summary = job_summary.sort_values('Petitions', ascending=False).head(10)
         job_summary['Avg Salary'] = job_summary['Avg Salary'].round(0).astype(int)
         job_summary['Min Salary'] = job_summary['Min Salary'].round(0).astype(int)
         job_summary['Max Salary'] = job_summary['Max Salary'].round(0).astype(int)
@@ -0,0 +1,68 @@
+"""Bounded thread pools that run a page's independent data loads at the same time.
+
+A page submits every load its tabs need for the current filter state at once; each
+runs on its own pooled cursor (DuckDB releases the GIL while executing), so the page
+waits for the slowest query instead of the sum of all of them. The global scheduler
+still admits the queries, so a burst of loads cannot oversubscribe the cores.
+
+Interactive loads (one-row summaries) run on a pool of their own, sized to the
+in-flight slots the scheduler keeps free of heavy queries, so they never queue behind
+heavy loads. Loader threads take their cursors from the share of the cursor pool
+reserved for them, so they never wait behind the script threads that wait on them;
+together the pools have no more threads than that reserve. A session's previous loads
+are cancelled before it submits new ones, so a user clicking through filters does not
+leave stale loads queued ahead of everyone else's.
+
+Loads must not call Streamlit: they run outside the script thread. Callers wait on
+the returned futures and report failures themselves.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from database_connection import db_cursor, LOADER_CURSORS
+from query_scheduler import MAX_HEAVY_QUERIES, MAX_INFLIGHT_QUERIES
+
+LOADER_THREADS = 4   # Heavy loads in flight per process; the scheduler bounds the queries beneath them
+
+# Process-wide pools shared by all sessions
+_executor = ThreadPoolExecutor(max_workers=LOADER_THREADS, thread_name_prefix='data-loader')
+_interactive_executor = ThreadPoolExecutor(
+    max_workers=max(1, min(MAX_INFLIGHT_QUERIES - MAX_HEAVY_QUERIES, LOADER_CURSORS - LOADER_THREADS)),
+    thread_name_prefix='interactive-loader'
+)
+
+def _run(load, args):
+    with db_cursor(reserved=True) as con:
+        return load(con, *args)
+
+def submit_loads(loads, interactive=(), key='page_loads'):
+    """Start every load at once: {name: (load, args)} -> {name: Future}.
+
+    Each load is called as load(cursor, *args) on a cursor of its own; loads named in
+    interactive run on the interactive pool. The futures are kept in the session state
+    under key: a load whose function and arguments are unchanged since the session's last
+    submit reuses its future unless that failed, and every other previous load is
+    cancelled if it has not started yet.
+    """
+    # Pages redefine their load functions on every rerun, so loads are compared by name
+    specs = {name: (load.__qualname__, args) for name, (load, args) in loads.items()}
+    previous = st.session_state.get(key, {})
+    reused = {
+        name: (spec, future) for name, (spec, future) in previous.items()
+        if specs.get(name) == spec and not future.cancelled()
+        and not (future.done() and future.exception() is not None)
+    }
+    # Loads of the last filter state nobody waits for any more
+    for name, (_, future) in previous.items():
+        if name not in reused:
+            future.cancel()
+    futures = {}
+    for name, (load, args) in loads.items():
+        if name in reused:
+            futures[name] = reused[name]
+        else:
+            executor = _interactive_executor if name in interactive else _executor
+            futures[name] = (specs[name], executor.submit(_run, load, args))
+    st.session_state[key] = futures
+    return {name: future for name, (_, future) in futures.items()}
@@ -0,0 +1,203 @@
+"""Shared query builder: a filter spec plus the columns or aggregates a view needs -> one statement.
+
+Every data loader describes its filters as a spec and calls select_rows() or aggregate()
+(execute() runs custom statements assembled around filtered_source()). They build a
+single parameterized statement that reads only the requested columns, and are the one
+place where statements run - through the result cache and scheduler (run_query),
+answered from cached row selections when they subsume the request (semantic_cache),
+routed to the wage cube when it can answer them, and timed per view for instrumentation.
+
+Filter spec keys (missing, None, '' and 'All' mean unfiltered):
+    employer, state, city, soc_title, job_title, year   equality on the dimension column
+    year_range          (first, last) inclusive
+    wage_levels         list of PW_WAGE_LEVEL values
+    exclude_other_soc   True drops SOC titles containing "other" (case-insensitive)
+    not_null            list of columns that must not be NULL
+    conditions          extra SQL predicates without parameters (disables cube routing)
+"""
+import threading
+import time
+
+from database_connection import run_query, get_enum_columns, PRIORITY_HEAVY, PRIORITY_INTERACTIVE
+from rollups import (TABLE, LOTTERY_FILTER, AGGREGATES, AGGREGATE_INPUTS, CUBE_DIMENSIONS, FILTER_DIMENSIONS,
+                     build_aggregate_query, cube_available)
+from semantic_cache import row_cache, output_name, SEMANTIC_SOURCE
+
+def _is_set(value):
+    return value is not None and value != '' and value != 'All'
+
+def _placeholder(column, enum_columns):
+    """Parameter marker for a value compared with column, typed as the column's ENUM when it has one
+    (DuckDB otherwise casts the column to text per row, which zone maps cannot prune with)"""
+    return f"TRY_CAST(? AS {enum_columns[column]})" if column in enum_columns else "?"
+
+def filter_conditions(filters):
+    """Translate a filter spec into (SQL predicates, parameters, referenced columns)"""
+    conditions, params, columns = [], [], set()
+    enum_columns = get_enum_columns()
+    for name, column in FILTER_DIMENSIONS.items():
+        value = filters.get(name)
+        if _is_set(value):
+            conditions.append(f"{column} = {_placeholder(column, enum_columns)}")
+            params.append(int(value) if name == 'year' else value)
+            columns.add(column)
+
+    year_range = filters.get('year_range')
+    if year_range:
+        conditions.append("YEAR BETWEEN ? AND ?")
+        params += [int(year_range[0]), int(year_range[1])]
+        columns.add('YEAR')
+
+    wage_levels = filters.get('wage_levels')
+    if wage_levels:
+        placeholder = _placeholder('PW_WAGE_LEVEL', enum_columns)
+        conditions.append(f"PW_WAGE_LEVEL IN ({', '.join(placeholder for _ in wage_levels)})")
+        params += list(wage_levels)
+        columns.add('PW_WAGE_LEVEL')
+
+    if filters.get('exclude_other_soc'):
+        conditions.append("LOWER(aggressive_normalized_soc_title) NOT LIKE '%other%'")
+        columns.add('aggressive_normalized_soc_title')
+
+    for column in filters.get('not_null', ()):
+        conditions.append(f"{column} IS NOT NULL")
+        columns.add(column)
+
+    for condition in filters.get('conditions', ()):
+        conditions.append(condition)
+        columns.add(None)   # Unknown columns - never routed to a rollup
+    return conditions, params, columns
+
+def filtered_source(filters):
+    """FROM/WHERE clause over the lottery petitions matching a filter spec, and its parameters,
+    for statements assembled by hand and run with execute()"""
+    conditions, params, _ = filter_conditions(filters)
+    return f"FROM {TABLE} WHERE {' AND '.join([LOTTERY_FILTER] + conditions)}", params
+
+def build_select(columns, filters, order_by=None):
+    """Row-level SELECT of only the given columns"""
+    source, params = filtered_source(filters)
+    query = f"SELECT {', '.join(columns)} {source}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return query, params
+
+def can_use_cube(group_by, aggregates, filter_columns):
+    """True when every grouping, filter and aggregate is available at the cube's grain"""
+    grouped = {column for column, _ in group_by}
+    return (
+        grouped.union(filter_columns) <= set(CUBE_DIMENSIONS)
+        and all(isinstance(aggregate, str) and aggregate in AGGREGATES for aggregate in aggregates)
+    )
+
+def build_aggregate(group_by, aggregates, filters, order_by=None, from_cube=False, limit=None):
+    """GROUP BY statement over the raw table or the wage cube (see rollups.build_aggregate_query)"""
+    conditions, params, _ = filter_conditions(filters)
+    return build_aggregate_query(group_by, aggregates, conditions, order_by, from_cube, limit=limit), params
+
+# Per-view instrumentation: view -> [statements, seconds, rows]
+_query_stats = {}
+_stats_lock = threading.Lock()
+
+def _row_count(data):
+    """Rows in a DataFrame or Arrow table"""
+    return len(data)
+
+def _filter_columns(filters):
+    return filter_conditions(filters)[2]
+
+def _query_rows(con, rows, query, params, result):
+    """Run a statement over a cached row selection registered as SEMANTIC_SOURCE"""
+    con.register(SEMANTIC_SOURCE, rows)
+    try:
+        # In-memory and small next to a table scan - never cached under this generic name
+        return run_query(con, query, params, priority=PRIORITY_INTERACTIVE, use_cache=False, result=result)
+    finally:
+        con.unregister(SEMANTIC_SOURCE)
+
+def _select_from_rows(con, columns, filters, query, params, priority, result):
+    """Answer a row selection from the smallest cached selection subsuming it; on a miss fetch
+    the rows as Arrow and keep them for narrower requests"""
+    found = row_cache.find(columns, filters, _filter_columns)
+    if found is None:
+        rows = run_query(con, query, params, priority=priority, use_cache=False, result='arrow')
+        row_cache.put(columns, filters, rows)
+        if result == 'arrow':
+            return rows
+        found = (rows, {})
+    rows, residual = found
+    names = [output_name(column) for column in columns]
+    if not residual and result == 'arrow':
+        # Arrow tables are immutable: the cached selection itself answers an unfiltered request
+        return rows.select(names)
+    conditions, row_params, _ = filter_conditions(residual)
+    row_query = f"SELECT {', '.join(names)} FROM {SEMANTIC_SOURCE}"
+    if conditions:
+        row_query += " WHERE " + " AND ".join(conditions)
+    return _query_rows(con, rows, row_query, row_params, result)
+
+def _aggregate_from_rows(con, group_by, aggregates, filters, order_by, limit, result):
+    """Re-aggregate a cached row selection subsuming the request, or None when there is none"""
+    if not all(isinstance(aggregate, str) and aggregate in AGGREGATES for aggregate in aggregates):
+        return None
+    needed = {column for column, _ in group_by} | set(AGGREGATE_INPUTS)
+    found = row_cache.find(needed, filters, _filter_columns)
+    if found is None:
+        return None
+    rows, residual = found
+    conditions, params, _ = filter_conditions(residual)
+    query = build_aggregate_query(group_by, aggregates, conditions, order_by, source_table=SEMANTIC_SOURCE, limit=limit)
+    return _query_rows(con, rows, query, params, result)
+
+def _execute(con, view, query, params, priority, result, answer=None, use_cache=True):
+    start_time = time.perf_counter()
+    data = run_query(con, query, params, priority=priority, use_cache=use_cache, result=result, answer=answer)
+    with _stats_lock:
+        stats = _query_stats.setdefault(view, [0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start_time
+        stats[2] += _row_count(data)
+    return data
+
+def execute(con, query, params, view, priority=PRIORITY_HEAVY, result='pandas'):
+    """Run a statement assembled from filter_conditions() through the same cache and instrumentation"""
+    return _execute(con, view, query, params, priority, result)
+
+def select_rows(con, columns, filters, order_by=None, view='rows', priority=PRIORITY_HEAVY, result='pandas'):
+    """Fetch the given columns of the petitions matching a filter spec (result as in run_query).
+
+    Unordered selections go through the semantic row cache: a spec narrower than a cached
+    one is answered by filtering the cached rows. The rows are held there only, not also
+    in the result cache.
+    """
+    query, params = build_select(columns, filters, order_by)
+    if order_by is not None:
+        return _execute(con, view, query, params, priority, result)
+    answer = lambda: _select_from_rows(con, columns, filters, query, params, priority, result)
+    return _execute(con, view, query, params, priority, result, answer, use_cache=False)
+
+def aggregate(con, group_by, aggregates, filters, order_by=None, view='aggregate', priority=PRIORITY_HEAVY,
+              result='pandas', limit=None):
+    """Fetch grouped aggregates for a filter spec, answered from the wage cube when possible.
+
+    group_by is a list of (column or expression, alias) pairs; aggregates holds AGGREGATES
+    names or (expression, alias) pairs for measures only the raw table can compute.
+    Cached row selections subsuming the spec are re-aggregated in memory first.
+    """
+    _, _, filter_columns = filter_conditions(filters)
+    from_cube = can_use_cube(group_by, aggregates, filter_columns) and cube_available(con)
+    query, params = build_aggregate(group_by, aggregates, filters, order_by, from_cube, limit)
+    answer = lambda: _aggregate_from_rows(con, group_by, aggregates, filters, order_by, limit, result)
+    return _execute(con, view, query, params, priority, result, answer)
+
+def get_semantic_cache_stats():
+    """Entries, bytes and hit/miss counters of the semantic row cache"""
+    return row_cache.stats()
+
+def get_query_stats():
+    """Statements, total seconds and rows returned per view since the process started"""
+    with _stats_lock:
+        return {
+            view: {'statements': calls, 'seconds': round(seconds, 3), 'rows': rows}
+            for view, (calls, seconds, rows) in _query_stats.items()
+        }
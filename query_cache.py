@@ -0,0 +1,116 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+
+# Cross-session result cache settings
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024           # Total memory the cache may hold
+RESULT_CACHE_MAX_ENTRY_BYTES = RESULT_CACHE_MAX_BYTES // 4   # Larger results are not cached
+
+def normalize_sql(query):
+    """Collapse whitespace so formatting differences map to the same cache key"""
+    return ' '.join(query.split())
+
+def file_fingerprint(path):
+    """Identify a database file version by path, size and modification time"""
+    try:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return (os.path.abspath(path), None, None)
+
+def directory_fingerprint(path):
+    """Identify a Parquet dataset version by its file count, total size and latest modification"""
+    count, total_size, latest = 0, 0, 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith('.parquet'):
+                stat = os.stat(os.path.join(root, name))
+                count += 1
+                total_size += stat.st_size
+                latest = max(latest, stat.st_mtime_ns)
+    return (os.path.abspath(path), count, total_size, latest)
+
+def make_cache_key(query, params, fingerprint, result='pandas'):
+    """Cache key: normalized SQL text + bound parameters + database fingerprint + result type"""
+    return (normalize_sql(query), tuple(params or ()), fingerprint, result)
+
+def estimate_size(value):
+    """Approximate memory footprint of a cached value in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pa.Table):
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 0
+
+def _copy(value):
+    """Copy mutable results so callers never modify the cached object (Arrow tables are immutable)"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    return value
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by total size in bytes, shared by all sessions"""
+
+    def __init__(self, max_bytes=RESULT_CACHE_MAX_BYTES, max_entry_bytes=RESULT_CACHE_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (value, size)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return a copy of the cached value, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+        return _copy(value)
+
+    def put(self, key, value):
+        """Store a value, evicting least recently used entries to stay under the byte cap"""
+        size = estimate_size(value)
+        if size > self.max_entry_bytes:
+            return
+        value = _copy(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Snapshot of cache size and hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+# Process-wide cache shared by all sessions
+result_cache = ResultCache()
@@ -0,0 +1,84 @@
+import os
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+# Query priorities - lower value is admitted first
+PRIORITY_INTERACTIVE = 0   # Sidebar dropdowns: small, latency sensitive
+PRIORITY_HEAVY = 1         # Tab loads and full-table scans
+
+# Global CPU budget shared by every session in the process
+THREAD_BUDGET = os.cpu_count() or 1
+MAX_HEAVY_QUERIES = max(1, THREAD_BUDGET // 2)
+MAX_INFLIGHT_QUERIES = max(THREAD_BUDGET, MAX_HEAVY_QUERIES + 1)   # Heavy loads never occupy every slot
+
+class QueryScheduler:
+    """Admission control in front of DuckDB.
+
+    DuckDB's ``threads`` setting belongs to the database instance, so the shared
+    database is sized to THREAD_BUDGET and this scheduler decides how many queries
+    share that pool at once. A query running alone gets every core; under load the
+    in-flight limit keeps cores from being oversubscribed. Waiting queries are
+    admitted by priority, so interactive sidebar queries jump ahead of heavy tab
+    loads, and heavy queries are capped at MAX_HEAVY_QUERIES so there is always
+    headroom for an interactive one.
+    """
+
+    def __init__(self, max_inflight=MAX_INFLIGHT_QUERIES, max_heavy=MAX_HEAVY_QUERIES):
+        self.max_inflight = max_inflight
+        self.max_heavy = max_heavy
+        self._cond = threading.Condition()
+        self._waiting = []   # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._inflight = {PRIORITY_INTERACTIVE: 0, PRIORITY_HEAVY: 0}
+        self._admitted = {PRIORITY_INTERACTIVE: 0, PRIORITY_HEAVY: 0}
+        self._wait_seconds = {PRIORITY_INTERACTIVE: 0.0, PRIORITY_HEAVY: 0.0}
+
+    def _can_admit(self, ticket):
+        priority = ticket[0]
+        if self._waiting[0] != ticket:
+            return False
+        if sum(self._inflight.values()) >= self.max_inflight:
+            return False
+        return priority != PRIORITY_HEAVY or self._inflight[PRIORITY_HEAVY] < self.max_heavy
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_HEAVY):
+        """Block until the query may run, then hold an in-flight slot for the with-block"""
+        ticket = (priority, next(self._sequence))
+        queued_at = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while not self._can_admit(ticket):
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._inflight[priority] += 1
+            self._admitted[priority] += 1
+            self._wait_seconds[priority] += time.monotonic() - queued_at
+            # The next waiter may be admissible too
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._inflight[priority] -= 1
+                self._cond.notify_all()
+
+    def stats(self):
+        """Snapshot of in-flight, queued and admitted queries per priority"""
+        with self._cond:
+            return {
+                'thread_budget': THREAD_BUDGET,
+                'inflight_interactive': self._inflight[PRIORITY_INTERACTIVE],
+                'inflight_heavy': self._inflight[PRIORITY_HEAVY],
+                'queued': len(self._waiting),
+                'admitted_interactive': self._admitted[PRIORITY_INTERACTIVE],
+                'admitted_heavy': self._admitted[PRIORITY_HEAVY],
+                'wait_seconds_interactive': round(self._wait_seconds[PRIORITY_INTERACTIVE], 3),
+                'wait_seconds_heavy': round(self._wait_seconds[PRIORITY_HEAVY], 3)
+            }
+
+# Process-wide scheduler shared by all sessions
+scheduler = QueryScheduler()
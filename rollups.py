@@ -0,0 +1,142 @@
+"""Pre-aggregated rollup tables and the router that answers aggregate queries from them.
+
+The wage cube is built by build_serving_db.py at the grain
+YEAR x EMPLOYER_STATE x STD_EMPLOYER_NAME_PARENT x aggressive_normalized_soc_title x PW_WAGE_LEVEL
+and stores additive measures, so any coarser GROUP BY over those columns can be
+answered by re-aggregating a few thousand cube rows instead of scanning the raw table.
+"""
+import threading
+
+TABLE = 'job_market_data_aggressive_normalized'
+CUBE_TABLE = 'wage_cube'
+DIMENSIONS_TABLE = 'filter_dimensions'
+COMBINATIONS_TABLE = 'filter_combinations'
+LOTTERY_FILTER = "VISA_CLASS = 'H-1B' AND is_lottery_petition = TRUE"
+
+# Columns kept at full detail in the cube - filters and groupings on these can be routed
+CUBE_DIMENSIONS = (
+    'YEAR',
+    'EMPLOYER_STATE',
+    'STD_EMPLOYER_NAME_PARENT',
+    'aggressive_normalized_soc_title',
+    'PW_WAGE_LEVEL'
+)
+
+# Aggregate name -> (expression over the raw table, equivalent expression over the cube).
+# Counts over no cube rows are 0, not NULL, as COUNT is over no raw rows
+AGGREGATES = {
+    'petition_count': ("COUNT(*)", "COALESCE(SUM(petition_count), 0)::BIGINT"),
+    'wage_count': ("COUNT(PREVAILING_WAGE)", "COALESCE(SUM(wage_count), 0)::BIGINT"),
+    'avg_salary': ("AVG(PREVAILING_WAGE)", "SUM(wage_sum) / NULLIF(SUM(wage_count), 0)"),
+    'min_salary': ("MIN(PREVAILING_WAGE)", "MIN(wage_min)"),
+    'max_salary': ("MAX(PREVAILING_WAGE)", "MAX(wage_max)"),
+    'level1_count': ("COUNT(CASE WHEN PW_WAGE_LEVEL = 'I' THEN 1 END)", "COALESCE(SUM(level1_count), 0)::BIGINT"),
+    'level2_count': ("COUNT(CASE WHEN PW_WAGE_LEVEL = 'II' THEN 1 END)", "COALESCE(SUM(level2_count), 0)::BIGINT"),
+    'level3_count': ("COUNT(CASE WHEN PW_WAGE_LEVEL = 'III' THEN 1 END)", "COALESCE(SUM(level3_count), 0)::BIGINT"),
+    'level4_count': ("COUNT(CASE WHEN PW_WAGE_LEVEL = 'IV' THEN 1 END)", "COALESCE(SUM(level4_count), 0)::BIGINT")
+}
+
+# Raw-table columns the AGGREGATES expressions read
+AGGREGATE_INPUTS = ('PREVAILING_WAGE', 'PW_WAGE_LEVEL')
+
+# ENUM types of the serving database (build_serving_db.py): column -> type name. Filters on
+# these columns compare against a value cast to the type so the scan can prune row groups
+ENUM_TYPES = {
+    'EMPLOYER_STATE': 'employer_state',
+    'PW_WAGE_LEVEL': 'wage_level'
+}
+
+# Dropdown dimensions: name -> column. filter_dimensions holds one row per distinct value of
+# each, tagged with the dimension name, with every other dimension column NULL
+FILTER_DIMENSIONS = {
+    'employer': 'STD_EMPLOYER_NAME_PARENT',
+    'state': 'EMPLOYER_STATE',
+    'city': 'EMPLOYER_CITY',
+    'soc_title': 'aggressive_normalized_soc_title',
+    'job_title': 'NORMALIZED_JOB_TITLE',
+    'year': 'YEAR'
+}
+
+# Availability of rollup tables is checked once per process (the database is read-only)
+_available_tables = None
+_available_lock = threading.Lock()
+
+def has_rollup_table(con, table_name):
+    """Check whether a rollup table (or a view over its Parquet export) exists in the open database"""
+    global _available_tables
+    with _available_lock:
+        if _available_tables is None:
+            try:
+                rows = con.execute("SELECT table_name FROM information_schema.tables").fetchall()
+                _available_tables = {row[0] for row in rows}
+            except Exception:
+                _available_tables = set()
+        return table_name in _available_tables
+
+def detect_enum_columns(con):
+    """ENUM_TYPES columns whose type exists in the open database: column -> type name
+    (empty for the raw database and the Parquet export)"""
+    try:
+        rows = con.execute("SELECT type_name FROM duckdb_types() WHERE logical_type = 'ENUM'").fetchall()
+    except Exception:
+        return {}
+    found = {row[0] for row in rows}
+    return {column: type_name for column, type_name in ENUM_TYPES.items() if type_name in found}
+
+def cube_available(con):
+    """True when the wage cube exists and aggregate queries can be routed to it"""
+    return has_rollup_table(con, CUBE_TABLE)
+
+def build_aggregate_query(group_by, aggregates, conditions=(), order_by=None, from_cube=False, source_table=None,
+                          limit=None):
+    """Build a GROUP BY query over the raw table or the wage cube with identical output columns.
+
+    group_by is a list of (column, alias) pairs, aggregates a list of AGGREGATES names or
+    (expression, alias) pairs and conditions a list of SQL predicates. When from_cube is
+    True every grouped or filtered column must be one of CUBE_DIMENSIONS and every
+    aggregate an AGGREGATES name. source_table replaces the raw table with rows already
+    restricted to lottery petitions (such as a cached row selection). limit keeps only the
+    first groups in order_by order.
+    """
+    select = [f"{column} AS {alias}" if alias != column else column for column, alias in group_by]
+    for aggregate in aggregates:
+        if isinstance(aggregate, tuple):
+            # (expression, alias) - a raw-table-only measure
+            select.append(f"{aggregate[0]} AS {aggregate[1]}")
+        else:
+            select.append(f"{AGGREGATES[aggregate][1 if from_cube else 0]} AS {aggregate}")
+
+    if source_table is None:
+        source_table = CUBE_TABLE if from_cube else TABLE
+    where = list(conditions) if from_cube or source_table != TABLE else [LOTTERY_FILTER] + list(conditions)
+    query = f"SELECT {', '.join(select)} FROM {source_table}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    if group_by:
+        query += " GROUP BY " + ", ".join(column for column, _ in group_by)
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    return query
+
+def build_dimensions_query(source_table=TABLE):
+    """Distinct values and petition counts of every filter dimension in one GROUPING SETS scan"""
+    columns = list(FILTER_DIMENSIONS.values())
+    dimension = " ".join(
+        f"WHEN GROUPING({column}) = 0 THEN '{name}'" for name, column in FILTER_DIMENSIONS.items()
+    )
+    return f"""
+    SELECT CASE {dimension} END AS dimension, {', '.join(columns)}, COUNT(*) AS petition_count
+    FROM {source_table}
+    WHERE {LOTTERY_FILTER}
+    GROUP BY GROUPING SETS ({', '.join(f'({column})' for column in columns)})
+    """
+
+def build_combinations_query(source_table=TABLE):
+    """Distinct combinations of the filter dimensions - the rows of the cascading filter index"""
+    return f"""
+    SELECT DISTINCT {', '.join(FILTER_DIMENSIONS.values())}
+    FROM {source_table}
+    WHERE {LOTTERY_FILTER}
+    """
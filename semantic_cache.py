@@ -0,0 +1,161 @@
+"""Subsumption-aware cache of row selections, kept as Arrow tables.
+
+select_rows() keeps the rows it fetches here together with their filter spec and
+columns. A later request whose filters imply a cached entry's filters (the same spec
+plus a job title, a state, wage levels, ...) selects a subset of those rows, so it is
+answered by running its predicates - and for aggregate() its GROUP BY - over the cached
+table in memory instead of scanning the petition table again. Drilling down from a
+company to one of its job titles, or drawing the state map for the rows already on
+screen, does not go back to the database.
+
+Raw SQL conditions cannot be re-checked, so specs with conditions only subsume specs
+with exactly the same conditions. Entries are tied to the database fingerprint and
+held in a byte-capped LRU.
+"""
+import threading
+from collections import OrderedDict
+
+from database_connection import get_database_fingerprint
+from rollups import FILTER_DIMENSIONS
+
+SEMANTIC_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SEMANTIC_CACHE_MAX_ENTRY_BYTES = SEMANTIC_CACHE_MAX_BYTES // 4
+SEMANTIC_SOURCE = 'semantic_rows'   # Name a cached table is registered under while it is queried
+
+def _is_set(value):
+    return value is not None and value != '' and value != 'All'
+
+def normalize_filters(filters):
+    """Filter spec with unset values dropped and every value in a comparable, hashable form"""
+    normalized = {}
+    for name in FILTER_DIMENSIONS:
+        value = filters.get(name)
+        if _is_set(value):
+            normalized[name] = int(value) if name == 'year' else value
+    if filters.get('year_range'):
+        first, last = filters['year_range']
+        normalized['year_range'] = (int(first), int(last))
+    if filters.get('wage_levels'):
+        normalized['wage_levels'] = frozenset(filters['wage_levels'])
+    if filters.get('exclude_other_soc'):
+        normalized['exclude_other_soc'] = True
+    if filters.get('not_null'):
+        normalized['not_null'] = frozenset(filters['not_null'])
+    if filters.get('conditions'):
+        normalized['conditions'] = frozenset(filters['conditions'])
+    return normalized
+
+def implies(filters, cached):
+    """True when every row matching the normalized spec filters also matches the spec cached"""
+    if filters.get('conditions') != cached.get('conditions'):
+        return False
+    for name, value in cached.items():
+        if name in FILTER_DIMENSIONS:
+            if filters.get(name) != value:
+                return False
+        elif name == 'year_range':
+            if 'year' in filters:
+                first = last = filters['year']
+            elif 'year_range' in filters:
+                first, last = filters['year_range']
+            else:
+                return False
+            if first < value[0] or last > value[1]:
+                return False
+        elif name == 'wage_levels':
+            if not filters.get('wage_levels', frozenset()) or not filters['wage_levels'] <= value:
+                return False
+        elif name == 'not_null':
+            if not value <= filters.get('not_null', frozenset()):
+                return False
+        elif name == 'exclude_other_soc':
+            if not filters.get('exclude_other_soc'):
+                return False
+    return True
+
+def residual_filters(filters, cached):
+    """Part of the normalized spec filters not already guaranteed by a spec cached that it implies -
+    the predicates still to apply to the cached rows"""
+    residual = {}
+    for name, value in filters.items():
+        if name == 'conditions' or cached.get(name) == value:
+            continue
+        if name == 'not_null':
+            value = value - cached.get('not_null', frozenset())
+        residual[name] = value
+    return residual
+
+def output_name(column):
+    """Result column name of a select expression ('expr AS alias' -> alias)"""
+    return column.rsplit(' AS ', 1)[-1].strip()
+
+class SemanticCache:
+    """Thread-safe LRU of row selections bounded by total size in bytes, shared by all sessions"""
+
+    def __init__(self, max_bytes=SEMANTIC_CACHE_MAX_BYTES, max_entry_bytes=SEMANTIC_CACHE_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (normalized filters, selected columns, table, size)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def find(self, columns, filters, filter_columns):
+        """Smallest cached table holding every row matching filters and the given select
+        expressions, as (table, residual filter spec), or None.
+
+        filter_columns(spec) names the columns a residual spec reads; they must have been
+        selected as plain columns.
+        """
+        normalized = normalize_filters(filters)
+        columns = set(columns)
+        fingerprint = get_database_fingerprint()
+        with self._lock:
+            best_key, best = None, None
+            for key, (cached_filters, cached_columns, table, _) in self._entries.items():
+                if key[0] != fingerprint or not implies(normalized, cached_filters):
+                    continue
+                residual = residual_filters(normalized, cached_filters)
+                if not columns.union(filter_columns(residual)) <= cached_columns:
+                    continue
+                if best is None or table.num_rows < best[0].num_rows:
+                    best_key, best = key, (table, residual)
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return best
+
+    def put(self, columns, filters, table):
+        """Remember the rows selected by columns under filters"""
+        size = int(table.nbytes)
+        if size > self.max_entry_bytes:
+            return
+        normalized = normalize_filters(filters)
+        key = (get_database_fingerprint(), tuple(columns), tuple(sorted(normalized.items())))
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[3]
+            self._entries[key] = (normalized, frozenset(columns), table, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self):
+        """Entry count, bytes held and hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+# Process-wide row cache shared by all sessions
+row_cache = SemanticCache()
@@ -0,0 +1,67 @@
+"""Aggregates routed to the wage cube must give the raw table's answer"""
+import duckdb
+import pytest
+
+from build_serving_db import build_wage_cube
+from rollups import TABLE, AGGREGATES, build_aggregate_query
+
+PETITIONS = [
+    # YEAR, EMPLOYER_STATE, STD_EMPLOYER_NAME_PARENT, aggressive_normalized_soc_title, PW_WAGE_LEVEL, PREVAILING_WAGE
+    (2023, 'CA', 'ACME', 'Software Developers', 'I', 95000),
+    (2023, 'CA', 'ACME', 'Software Developers', 'II', 120000),
+    (2024, 'NY', 'ACME', 'Data Scientists', 'III', None),
+    (2024, 'WA', 'GLOBEX', 'Software Developers', 'IV', 180000),
+    (2024, 'WA', 'GLOBEX', 'Software Developers', None, 70000),
+]
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute(f"""
+    CREATE TABLE {TABLE} (
+        YEAR INTEGER, EMPLOYER_STATE VARCHAR, STD_EMPLOYER_NAME_PARENT VARCHAR,
+        aggressive_normalized_soc_title VARCHAR, PW_WAGE_LEVEL VARCHAR, PREVAILING_WAGE INTEGER,
+        VISA_CLASS VARCHAR DEFAULT 'H-1B', is_lottery_petition BOOLEAN DEFAULT TRUE
+    )
+    """)
+    con.executemany(
+        f"INSERT INTO {TABLE} (YEAR, EMPLOYER_STATE, STD_EMPLOYER_NAME_PARENT, aggressive_normalized_soc_title, "
+        "PW_WAGE_LEVEL, PREVAILING_WAGE) VALUES (?, ?, ?, ?, ?, ?)",
+        PETITIONS
+    )
+    build_wage_cube(con)
+    yield con
+    con.close()
+
+def _rounded(rows):
+    """Rows with floats rounded - the cube averages from sums, the raw table directly"""
+    return [tuple(round(value, 6) if isinstance(value, float) else value for value in row) for row in rows]
+
+def _both(con, group_by, conditions, params, order_by=None):
+    return [
+        _rounded(con.execute(
+            build_aggregate_query(group_by, list(AGGREGATES), conditions, order_by, from_cube=from_cube), params
+        ).fetchall())
+        for from_cube in (False, True)
+    ]
+
+@pytest.mark.parametrize('conditions, params', [
+    ([], []),
+    (["STD_EMPLOYER_NAME_PARENT = ?"], ['ACME']),
+    (["STD_EMPLOYER_NAME_PARENT = ?"], ['NOBODY']),
+    (["YEAR = ?", "EMPLOYER_STATE = ?"], [2023, 'WA']),
+])
+def test_cube_matches_raw_table(con, conditions, params):
+    raw, cube = _both(con, [], conditions, params)
+    assert cube == raw
+
+def test_empty_selection_counts_are_zero(con):
+    raw, cube = _both(con, [], ["STD_EMPLOYER_NAME_PARENT = ?"], ['NOBODY'])
+    row = dict(zip(AGGREGATES, cube[0]))
+    assert cube == raw
+    assert row['petition_count'] == row['wage_count'] == row['level1_count'] == 0
+    assert row['avg_salary'] is None and row['min_salary'] is None
+
+def test_grouped_cube_matches_raw_table(con):
+    raw, cube = _both(con, [('YEAR', 'year'), ('PW_WAGE_LEVEL', 'level')], [], [], order_by='year, level NULLS LAST')
+    assert cube == raw
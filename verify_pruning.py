@@ -0,0 +1,77 @@
+"""Report how much of the petitions table representative app queries actually read.
+
+Usage:
+    python verify_pruning.py [--database job_market_serving.duckdb] [--company AMAZON] [--year 2024] [--state CA]
+
+Runs each query with DuckDB profiling enabled and compares the rows the table scan
+touched with the table size. On a table clustered by build_serving_db.py,
+per-company queries should read a handful of row groups regardless of how large
+the dataset grows; on an unclustered table they read all of them.
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+
+import duckdb
+
+from rollups import TABLE, LOTTERY_FILTER, detect_enum_columns
+
+ROW_GROUP_SIZE = 122880   # DuckDB's default rows per row group
+
+# (name, SQL, parameter names) - mirrors the filters of the main explorer views; {state} is the
+# state parameter marker, typed as the ENUM like query_builder.filter_conditions() does
+REPRESENTATIVE_QUERIES = [
+    ("Company + year (main explorer)",
+     f"SELECT COUNT(*), AVG(PREVAILING_WAGE) FROM {TABLE} WHERE {LOTTERY_FILTER} AND STD_EMPLOYER_NAME_PARENT = ? AND YEAR = ?",
+     ['company', 'year']),
+    ("Company, all years (yearly analysis)",
+     f"SELECT YEAR, COUNT(*) FROM {TABLE} WHERE {LOTTERY_FILTER} AND STD_EMPLOYER_NAME_PARENT = ? GROUP BY YEAR",
+     ['company']),
+    ("Company + year + state",
+     f"SELECT COUNT(*) FROM {TABLE} WHERE {LOTTERY_FILTER} AND STD_EMPLOYER_NAME_PARENT = ? AND YEAR = ? AND EMPLOYER_STATE = {{state}}",
+     ['company', 'year', 'state']),
+    ("State + year (state explorer)",
+     f"SELECT COUNT(*) FROM {TABLE} WHERE {LOTTERY_FILTER} AND EMPLOYER_STATE = {{state}} AND YEAR = ?",
+     ['state', 'year'])
+]
+
+def scanned_rows(con, query, params, profile_path):
+    """Run a query with profiling and return the rows read by its table scans"""
+    con.execute(query, params).fetchall()
+    with open(profile_path) as f:
+        profile = json.load(f)
+    return profile.get('cumulative_rows_scanned', 0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Report row groups read by representative app queries")
+    parser.add_argument('--database', default='job_market_serving.duckdb', help="DuckDB file to inspect")
+    parser.add_argument('--company', default='AMAZON')
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--state', default='CA')
+    args = parser.parse_args()
+    values = {'company': args.company, 'year': args.year, 'state': args.state}
+
+    con = duckdb.connect(args.database, read_only=True)
+    total_rows = con.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+    total_groups = max(1, math.ceil(total_rows / ROW_GROUP_SIZE))
+    print(f"{args.database}: {total_rows:,} rows in ~{total_groups} row groups")
+
+    profile_path = os.path.join(tempfile.mkdtemp(), 'profile.json')
+    con.execute("PRAGMA enable_profiling='json'")
+    con.execute(f"PRAGMA profiling_output='{profile_path}'")
+    con.execute("""SET custom_profiling_settings='{"CUMULATIVE_ROWS_SCANNED": "true"}'""")
+
+    enum_columns = detect_enum_columns(con)
+    state = f"TRY_CAST(? AS {enum_columns['EMPLOYER_STATE']})" if 'EMPLOYER_STATE' in enum_columns else "?"
+    for name, query, param_names in REPRESENTATIVE_QUERIES:
+        query = query.replace('{state}', state)
+        rows = scanned_rows(con, query, [values[p] for p in param_names], profile_path)
+        groups = math.ceil(rows / ROW_GROUP_SIZE)
+        print(f"  {name:40s} {rows:>12,} rows scanned  ~{groups}/{total_groups} row groups ({rows / max(total_rows, 1):.1%})")
+
+    con.close()
+
+if __name__ == '__main__':
+    main()